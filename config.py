@@ -3,12 +3,16 @@ Yapılandırma Ayarları
 """
 import os
 import logging
-from dotenv import load_dotenv
 from pathlib import Path
 
 # .env dosyasını yükle
 # override=False: Railway gibi platformlarda environment variables'ı korur
-load_dotenv(override=False)
+# Zorunlu değişkenler zaten ortamdaysa (konteyner vb.) dotenv hiç içe aktarılmaz;
+# AKILLI_SKIP_DOTENV=1 ile yükleme tamamen kapatılabilir
+if os.getenv('AKILLI_SKIP_DOTENV') != '1' and not (
+        os.getenv('GEMINI_API_KEY') and os.getenv('TELEGRAM_BOT_TOKEN')):
+    from dotenv import load_dotenv
+    load_dotenv(override=False)
 
 # Proje dizini
 BASE_DIR = Path(__file__).resolve().parent
@@ -18,9 +22,35 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 REPLICATE_API_TOKEN = os.getenv('REPLICATE_API_TOKEN', '')
 
+# Telegram Güncelleme Alma
+# TELEGRAM_WEBHOOK_URL verilirse (örn: https://bot.example.com) Telegram güncellemeleri
+# bu adrese gönderir; verilmezse long polling kullanılır
+TELEGRAM_WEBHOOK_URL = os.getenv('TELEGRAM_WEBHOOK_URL', '').rstrip('/')
+TELEGRAM_WEBHOOK_PORT = int(os.getenv('PORT', '8443'))  # Railway gibi platformlar PORT'u kendisi verir
+TELEGRAM_WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET') or None
+TELEGRAM_POLL_TIMEOUT = 30  # Saniye; long polling isteği güncelleme gelene kadar açık kalır
+# Aynı anda işlenebilecek en fazla güncelleme; aynı sohbetin güncellemeleri yine sırayla işlenir
+TELEGRAM_CONCURRENT_UPDATES = 64
+
 # Veritabanı
 DATABASE_URL = os.getenv('DATABASE_URL', f'sqlite:///{BASE_DIR}/data/assistant.db')
 
+# Bağlantı havuzu (SQLite dışındaki veritabanları için)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '20'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # Saniye
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Saniye
+# LIFO: en son bırakılan (sıcak) bağlantı tekrar kullanılır, boştaki fazlalar zaman aşımına düşer
+DB_POOL_USE_LIFO = os.getenv('DB_POOL_USE_LIFO', 'true').lower() in ('1', 'true', 'yes')
+
+# Derlenmiş SQL ifadesi önbelleği (SQLAlchemy varsayılanı 500)
+DB_QUERY_CACHE_SIZE = int(os.getenv('DB_QUERY_CACHE_SIZE', '1200'))
+
+# Geliştirme: her DatabaseManager çağrısının çalıştırdığı SQL sayısını logla
+DEBUG_SQL_COUNT = os.getenv('DEBUG_SQL_COUNT', 'false').lower() in ('1', 'true', 'yes')
+SQL_COUNT_WARN_THRESHOLD = 2  # Bundan fazla sorgu çalıştıran çağrılar WARNING ile loglanır
+
 # Zaman Dilimi
 TIMEZONE = os.getenv('TIMEZONE', 'Europe/Istanbul')
 
@@ -30,6 +60,11 @@ LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 # Loglama yapılandırması
+# Log formatında kullanılmayan thread/süreç bilgileri her kayıtta toplanmasın
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
     format=LOG_FORMAT,
@@ -51,7 +86,7 @@ def check_config():
         missing.append('TELEGRAM_BOT_TOKEN')
     
     if missing:
-        logger.warning(f"Eksik yapılandırma: {', '.join(missing)}")
+        logger.warning("Eksik yapılandırma: %s", ', '.join(missing))
         logger.warning("Lütfen .env dosyasını oluşturun ve gerekli değerleri ekleyin")
         return False
     
@@ -65,6 +100,29 @@ GEMINI_MAX_TOKENS = 2048
 # Chat Geçmişi Limitleri
 MAX_CHAT_HISTORY = 50  # Veritabanında saklanacak maksimum mesaj sayısı
 CONTEXT_WINDOW = 10    # AI'ya gönderilecek son mesaj sayısı
+CHAT_CLEANUP_INTERVAL = 10 * 60  # Saniye; zamanlayıcı eski sohbet mesajlarını bu aralıkla temizler
+CHAT_HISTORY_CACHE_SIZE = 1024  # Son CONTEXT_WINDOW mesajı bellekte tutulacak maksimum kullanıcı sayısı
+
+# Kullanıcı Önbelleği
+USER_CACHE_TTL = 60      # Saniye; get_or_create_user sonucu bu süre boyunca bellekten döner
+USER_CACHE_SIZE = 1024   # Önbellekte tutulacak maksimum kullanıcı sayısı
+
+# İstatistik Önbelleği (streak, toplam quiz, quiz ortalaması, ders listesi)
+STATS_CACHE_TTL = 5       # Saniye; quiz/ilerleme yazımında kullanıcının kayıtları hemen silinir
+STATS_CACHE_SIZE = 4096   # Önbellekte istatistiği tutulacak maksimum kullanıcı sayısı
+
+# AI Öğretmen Yanıt Önbelleği (aynı ders/konu isteği Gemini'ye tekrar gitmez)
+EXPLAIN_CACHE_TTL = 24 * 60 * 60  # Saniye; konu anlatımları değişmeyen içerik
+QUIZ_CACHE_TTL = 60 * 60          # Saniye; quiz soruları daha kısa süre tekrar kullanılır
+AI_TEACHER_CACHE_SIZE = 512       # Önbellekte tutulacak maksimum yanıt sayısı
+AI_MAX_CONCURRENCY = 20           # Çoklu konu isteklerinde aynı anda yapılacak en fazla Gemini isteği
 
 # Hatırlatıcı Ayarları
 REMINDER_CHECK_INTERVAL = 60  # Saniye cinsinden kontrol aralığı
+
+# Geçici Görüntü Temizliği
+TEMP_IMAGE_CLEANUP_INTERVAL = 60 * 60  # Saniye; zamanlayıcı eski geçici görüntüleri bu aralıkla siler
+
+# Görüntü Yükseltme Önbelleği (aynı görüntü tekrar gönderilirse Replicate'e gidilmez)
+UPSCALE_CACHE_TTL = 50 * 60  # Saniye; Replicate çıktı URL'leri yaklaşık bir saat erişilebilir kalır
+UPSCALE_CACHE_SIZE = 256     # Önbellekte tutulacak maksimum görüntü sayısı
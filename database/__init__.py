@@ -1,8 +1,40 @@
 """
 Database package initialization
 """
-from .db_manager import DatabaseManager
-from .models import User, Note, Task, Reminder, ChatHistory, Course, Topic, Quiz, StudyProgress
+import importlib
 
-__all__ = ['DatabaseManager', 'User', 'Note', 'Task', 'Reminder', 'ChatHistory',
-           'Course', 'Topic', 'Quiz', 'StudyProgress']
+# İsimler ilk erişimde yüklenir (PEP 562); `database.models` gibi alt modülleri
+# kullanan kod, DatabaseManager'ın bağımlılıklarını içe aktarmak zorunda kalmaz
+_LAZY_IMPORTS = {
+    'DatabaseManager': '.db_manager',
+    'AsyncDatabaseManager': '.db_manager',
+    'get_db_manager': '.db_manager',
+    'init_db': '.db_manager',
+    'User': '.models',
+    'Note': '.models',
+    'Task': '.models',
+    'Reminder': '.models',
+    'ChatHistory': '.models',
+    'Course': '.models',
+    'Topic': '.models',
+    'Quiz': '.models',
+    'StudyProgress': '.models',
+    'Explanation': '.models',
+}
+
+__all__ = ['DatabaseManager', 'AsyncDatabaseManager', 'get_db_manager', 'init_db',
+           'User', 'Note', 'Task', 'Reminder', 'ChatHistory',
+           'Course', 'Topic', 'Quiz', 'StudyProgress', 'Explanation']
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
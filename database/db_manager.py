@@ -1,18 +1,248 @@
 """
 Veritabanı Yönetim Sistemi
 """
+import asyncio
+import contextvars
+import functools
+import json
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, date
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, and_, or_
+from typing import Callable, Iterable, Iterator, List, Optional, Dict, Any, Set, Tuple
+from sqlalchemy import (
+    create_engine, event, and_, or_, case, func, select, insert, update, delete, bindparam,
+    text, table, column, literal_column, inspect, exists, tuple_
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Row, make_url
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import StaticPool
 
-from config import DATABASE_URL, MAX_CHAT_HISTORY
-from .models import Base, User, Note, Task, Reminder, ChatHistory, PriorityLevel, Course, Topic, Quiz, StudyProgress
+from config import (
+    DATABASE_URL, MAX_CHAT_HISTORY, USER_CACHE_TTL, USER_CACHE_SIZE,
+    STATS_CACHE_TTL, STATS_CACHE_SIZE,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_POOL_TIMEOUT,
+    DB_POOL_USE_LIFO, DB_QUERY_CACHE_SIZE, DEBUG_SQL_COUNT, SQL_COUNT_WARN_THRESHOLD
+)
+from .models import Base, utcnow, note_search_vector, User, Note, Task, Reminder, ChatHistory, PriorityLevel, Course, Topic, Quiz, StudyProgress, Explanation
 
 logger = logging.getLogger(__name__)
 
+# ON CONFLICT destekleyen dialect'ler için INSERT yapıcıları
+_UPSERT_INSERTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': pg_insert,
+}
+
+# Veritabanındaki rolleri Gemini'nin kabul ettiği 'user' / 'model' değerlerine eşle
+_GEMINI_ROLES = {
+    'user': 'user',
+    'assistant': 'model',
+    'model': 'model',
+}
+
+# Her yeni SQLite bağlantısında uygulanır: WAL günlüğü commit başına fsync'i
+# kaldırır, okumalar mmap üzerinden yapılır
+_SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+    # SQLite ForeignKey kısıtlarını varsayılan olarak uygulamaz
+    'PRAGMA foreign_keys=ON',
+)
+
+# Sık çalışan sorgular modül seviyesinde bir kez kurulur; parametreler bindparam
+# ile verildiği için her çağrıda aynı derlenmiş SQL önbellekten kullanılır
+_NOTES_BY_USER = select(Note).where(
+    Note.user_id == bindparam('user_id')
+).order_by(Note.created_at.desc())
+
+_NOTES_BY_CATEGORY = select(Note).where(
+    Note.user_id == bindparam('user_id'),
+    Note.category == bindparam('category')
+).order_by(Note.created_at.desc())
+
+# Notların kendisi yerine yalnızca kategori/sayı; ix_notes_user_category ile karşılanır
+_NOTE_CATEGORIES = select(Note.category).where(
+    Note.user_id == bindparam('user_id')
+).distinct().order_by(Note.category)
+
+_NOTE_COUNT = select(func.count(Note.id)).where(
+    Note.user_id == bindparam('user_id')
+)
+
+_NOTE_COUNT_BY_CATEGORY = select(func.count(Note.id)).where(
+    Note.user_id == bindparam('user_id'),
+    Note.category == bindparam('category')
+)
+
+_TASKS_ALL = select(Task).where(
+    Task.user_id == bindparam('user_id')
+).order_by(Task.due_date.asc())
+
+_TASKS_OPEN = select(Task).where(
+    Task.user_id == bindparam('user_id'),
+    Task.is_completed == False
+).order_by(Task.due_date.asc())
+
+_TASKS_DUE_BETWEEN = select(Task).where(
+    Task.user_id == bindparam('user_id'),
+    Task.is_completed == False,
+    Task.due_date >= bindparam('start'),
+    Task.due_date < bindparam('end')
+).order_by(Task.due_date.asc())
+
+# Uçlar dahil tarih aralığı; ix_tasks_user_done_due üzerinde aralık taraması
+_TASKS_DUE_IN_RANGE = select(Task).where(
+    Task.user_id == bindparam('user_id'),
+    Task.due_date.between(bindparam('start'), bindparam('end'))
+).order_by(Task.due_date.asc())
+
+_OPEN_TASKS_DUE_IN_RANGE = _TASKS_DUE_IN_RANGE.where(Task.is_completed == False)
+
+# Son `limit` mesaj, sunucu tarafında eskiden yeniye sıralı
+_LATEST_CHAT = select(
+    ChatHistory.role, ChatHistory.message, ChatHistory.created_at
+).where(
+    ChatHistory.user_id == bindparam('user_id')
+).order_by(
+    ChatHistory.created_at.desc()
+).limit(bindparam('limit')).subquery()
+
+_CHAT_HISTORY = select(
+    _LATEST_CHAT.c.role, _LATEST_CHAT.c.message
+).order_by(_LATEST_CHAT.c.created_at.asc())
+
+_QUIZ_AVG_PCT = select(
+    func.avg(Quiz.score * 100.0 / Quiz.total_questions)
+).join(
+    Topic, Quiz.topic_id == Topic.id
+).where(
+    Topic.course_id == bindparam('course_id'),
+    Quiz.user_id == bindparam('user_id'),
+    Quiz.total_questions > 0
+)
+
+# Hatırlatıcı sahiplenirken alıcının Telegram ID'si (UPDATE ... RETURNING içinde de çalışır)
+_REMINDER_TELEGRAM_ID = select(User.telegram_id).where(
+    User.id == Reminder.user_id
+).scalar_subquery().label('telegram_id')
+_REMINDER_HAS_USER = exists().where(User.id == Reminder.user_id)
+
+# Query.count() gibi alt sorgu sarmadan düz COUNT; ix_quizzes_user_* index'leriyle karşılanır
+_QUIZ_COUNT = select(
+    func.count(Quiz.id)
+).where(
+    Quiz.user_id == bindparam('user_id')
+)
+
+_MAX_STREAK = select(
+    func.max(StudyProgress.streak_days)
+).where(
+    StudyProgress.user_id == bindparam('user_id')
+)
+
+# Yalnızca gösterilen sütunlar; Quiz/Topic nesneleri oluşturulmaz
+_LAST_QUIZ_RESULTS = select(
+    Quiz.score,
+    Quiz.total_questions,
+    Quiz.completed_at,
+    Topic.title.label('topic_title'),
+).join(
+    Topic, Quiz.topic_id == Topic.id
+).where(
+    Quiz.user_id == bindparam('user_id')
+).order_by(
+    Quiz.completed_at.desc()
+).limit(bindparam('limit'))
+
+# SQLite FTS5 not arama indeksi: notes tablosunu içerik kaynağı olarak kullanır,
+# tetikleyicilerle senkron tutulur. trigram tokenizer LIKE '%kelime%' ile aynı
+# alt dize eşleşmesini sağlar, ancak en az 3 karakterlik aramalarda kullanılabilir
+_NOTES_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+    "content, category, content='notes', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, content, category) VALUES (new.id, new.content, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, content, category) "
+    "VALUES ('delete', old.id, old.content, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, content, category) "
+    "VALUES ('delete', old.id, old.content, old.category); "
+    "INSERT INTO notes_fts(rowid, content, category) VALUES (new.id, new.content, new.category); END",
+)
+_NOTES_FTS_MIN_LENGTH = 3
+
+_notes_fts = table('notes_fts', column('rowid'), column('notes_fts'))
+
+# PostgreSQL: ix_notes_search GIN index'iyle aynı ifade
+_NOTE_SEARCH_VECTOR = note_search_vector(Note.content, Note.category)
+_NOTE_SEARCH_CONFIG = literal_column("'simple'")
+
+
+@functools.lru_cache(maxsize=1)
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """
+    Günün [başlangıç, ertesi gün) aralığı; gün değişene kadar önbellekten döner
+    
+    Görev bitiş tarihleri kullanıcının yerel saatiyle girildiği için UTC değil
+    yerel gün kullanılır.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+# İstatistik önbelleğinde kayıt yok işareti (None geçerli bir değer olabilir)
+_CACHE_MISS = object()
+
+
+# DEBUG_SQL_COUNT açıkken o anki DatabaseManager çağrısının sorgu sayacı
+_query_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    '_query_counter', default=None
+)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    """before_cursor_execute: aktif çağrının sayacını artır"""
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def _log_query_count(method: Callable) -> Callable:
+    """Metodun çalıştırdığı SQL sayısını logla; iç içe çağrılar dıştakine sayılır"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _query_counter.get() is not None:
+            return method(*args, **kwargs)
+        counter = [0]
+        token = _query_counter.set(counter)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _query_counter.reset(token)
+            level = logging.WARNING if counter[0] > SQL_COUNT_WARN_THRESHOLD else logging.DEBUG
+            logger.log(level, "%s: %s SQL sorgusu", method.__name__, counter[0])
+    
+    return wrapper
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLite bağlantısı açıldığında performans ayarlarını uygula"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 class DatabaseManager:
     """Veritabanı işlemlerini yöneten sınıf"""
@@ -24,26 +254,184 @@ class DatabaseManager:
         Args:
             db_url: Veritabanı bağlantı URL'si
         """
-        self.engine = create_engine(db_url, echo=False)
-        self.SessionLocal = sessionmaker(bind=self.engine)
-        self._create_tables()
+        self.engine = create_engine(
+            db_url, echo=False, query_cache_size=DB_QUERY_CACHE_SIZE, **self._engine_options(db_url)
+        )
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
+        self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False, autoflush=False)
+        self.aio = AsyncDatabaseManager(self)
+        # telegram_id -> (detached User, önbelleğe alınma zamanı)
+        self._user_cache: Dict[int, Tuple[User, float]] = {}
+        # user_id -> {(istatistik, argümanlar): (değer, önbelleğe alınma zamanı)}
+        self._stats_cache: Dict[int, Dict[Tuple, Tuple[Any, float]]] = {}
+        # Önbellekler thread havuzundan yazılıp event loop'tan okunur
+        self._cache_lock = threading.Lock()
+        # Her geçersiz kılmada artar; hesaplama sürerken geçersiz kılınan değer önbelleğe yazılmaz
+        self._stats_generation = 0
+        # Son temizlikten bu yana mesaj eklenen kullanıcılar (cleanup_chat_history)
+        self._chat_cleanup_lock = threading.Lock()
+        self._chat_cleanup_users: Set[int] = set()
+        # create_tables FTS5 indeksini kurabilirse search_notes onu kullanır
+        self._notes_fts = False
+        if DEBUG_SQL_COUNT:
+            self._enable_query_counting()
+    
+    def _enable_query_counting(self):
+        """Public metodları sorgu sayacıyla sar (yalnızca DEBUG_SQL_COUNT açıkken)"""
+        event.listen(self.engine, 'before_cursor_execute', _count_query)
+        for name in dir(type(self)):
+            if name.startswith('_') or not callable(getattr(type(self), name)):
+                continue
+            setattr(self, name, _log_query_count(getattr(self, name)))
     
-    def _create_tables(self):
-        """Veritabanı tablolarını oluştur"""
+    @staticmethod
+    def _engine_options(db_url: str) -> Dict[str, Any]:
+        """Veritabanı türüne göre bağlantı havuzu ayarlarını belirle"""
+        url = make_url(db_url)
+        if url.get_backend_name() == 'sqlite':
+            if url.database in (None, '', ':memory:'):
+                # Bellek içi SQLite: tüm thread'ler tek bağlantıyı paylaşmalı
+                return {
+                    'poolclass': StaticPool,
+                    'connect_args': {'check_same_thread': False},
+                }
+            # Dosya tabanlı SQLite: varsayılan havuz yeterli
+            return {}
+        options = {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_recycle': DB_POOL_RECYCLE,
+            'pool_pre_ping': DB_POOL_PRE_PING,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_use_lifo': DB_POOL_USE_LIFO,
+        }
+        if url.get_driver_name() == 'psycopg2':
+            # Çoklu INSERT'ler zaten tek VALUES listesiyle gider; UPDATE/DELETE
+            # executemany çağrıları da execute_batch ile gruplanır
+            options['executemany_mode'] = 'values_plus_batch'
+        return options
+    
+    def create_tables(self):
+        """Veritabanı tablolarını oluştur (uygulama açılışında bir kez, bkz. init_db)"""
         try:
             Base.metadata.create_all(self.engine)
+            # create_all mevcut tablolara sonradan eklenen index'leri oluşturmaz
+            with self.engine.begin() as conn:
+                existing = self._existing_index_names(conn)
+                for table in Base.metadata.sorted_tables:
+                    for index in table.indexes:
+                        if index.name not in existing:
+                            if index.name == 'ux_study_progress_user_course':
+                                self._dedupe_study_progress(conn)
+                            index.create(conn)
             logger.info("Veritabanı tabloları oluşturuldu")
         except SQLAlchemyError as e:
-            logger.error(f"Tablo oluşturma hatası: {e}")
+            logger.error("Tablo oluşturma hatası: %s", e)
             raise
+        
+        if self.engine.dialect.name == 'sqlite':
+            self._notes_fts = self._create_notes_fts()
+    
+    def _dedupe_study_progress(self, conn):
+        """
+        Benzersiz index eklenmeden önce yinelenen ilerleme kayıtlarını sil
+
+        Eski SELECT + INSERT yolu aynı (user_id, course_id) için birden fazla satır
+        bırakmış olabilir; en son çalışılan (eşitlikte en yeni id) satır kalır.
+        """
+        duplicate_pairs = select(
+            StudyProgress.user_id, StudyProgress.course_id
+        ).group_by(
+            StudyProgress.user_id, StudyProgress.course_id
+        ).having(func.count() > 1)
+        rows = conn.execute(
+            select(StudyProgress.id, StudyProgress.user_id, StudyProgress.course_id)
+            .where(tuple_(StudyProgress.user_id, StudyProgress.course_id).in_(duplicate_pairs))
+            .order_by(
+                StudyProgress.user_id,
+                StudyProgress.course_id,
+                StudyProgress.last_study_date.desc().nulls_last(),
+                StudyProgress.id.desc(),
+            )
+        ).all()
+        
+        seen = set()
+        stale_ids = []
+        for progress_id, user_id, course_id in rows:
+            if (user_id, course_id) in seen:
+                stale_ids.append(progress_id)
+            else:
+                seen.add((user_id, course_id))
+        if stale_ids:
+            conn.execute(delete(StudyProgress).where(StudyProgress.id.in_(stale_ids)))
+            logger.warning("%d yinelenen çalışma ilerlemesi kaydı silindi", len(stale_ids))
+    
+    def _existing_index_names(self, conn) -> Set[str]:
+        """Veritabanındaki index adları (ifade tabanlı index'ler dahil)"""
+        if self.engine.dialect.name == 'sqlite':
+            # SQLAlchemy SQLite'ta ifade tabanlı index'leri yansıtmaz; katalogdan oku
+            return set(conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index'")
+            ).scalars())
+        inspector = inspect(conn)
+        return {
+            index['name']
+            for table in Base.metadata.sorted_tables
+            for index in inspector.get_indexes(table.name)
+        }
+    
+    def _create_notes_fts(self) -> bool:
+        """
+        Notlar için FTS5 arama indeksini oluştur
+        
+        Returns:
+            İndeks kullanılabiliyorsa True (SQLite FTS5/trigram desteklemiyorsa False)
+        """
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")
+                ).first()
+                for ddl in _NOTES_FTS_DDL:
+                    conn.execute(text(ddl))
+                if not exists:
+                    # Mevcut notları indekse aktar
+                    conn.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')"))
+            return True
+        except SQLAlchemyError as e:
+            logger.warning("Not arama indeksi oluşturulamadı, LIKE araması kullanılacak: %s", e)
+            return False
     
     def get_session(self) -> Session:
         """Yeni bir veritabanı oturumu döndür"""
         return self.SessionLocal()
     
+    @contextmanager
+    def _session(self, commit: bool = False) -> Iterator[Session]:
+        """
+        Kısa ömürlü oturum aç; hata olursa geri al, her durumda kapat
+        
+        Kapanışta oturumdaki nesneler detached olur; expire_on_commit=False
+        sayesinde yüklü sütunları oturum dışında da okunabilir.
+        
+        Args:
+            commit: Blok hatasız biterse commit et
+        """
+        session = self.SessionLocal()
+        try:
+            yield session
+            if commit:
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     # ============ KULLANICI İŞLEMLERİ ============
     
-    def get_or_create_user(self, telegram_id: int, username: str = None, 
+    def get_or_create_user(self, telegram_id: int, username: str = None,
                           first_name: str = None, last_name: str = None) -> User:
         """
         Kullanıcıyı getir veya oluştur
@@ -53,42 +441,150 @@ class DatabaseManager:
             username: Kullanıcı adı
             first_name: Ad
             last_name: Soyad
-            
+        
         Returns:
             User nesnesi (detached)
         """
-        session = self.get_session()
+        user = self._cached_user(telegram_id, username, first_name, last_name)
+        if user is not None:
+            return user
+        
+        user = self._upsert_user(telegram_id, username, first_name, last_name)
+        self._cache_user(user)
+        return user
+    
+    def _cached_user(self, telegram_id: int, username: str = None,
+                     first_name: str = None, last_name: str = None) -> Optional[User]:
+        """
+        Önbellekteki kullanıcıyı döndür; süresi dolmuşsa veya bilgileri değiştiyse None
+        
+        Aktif kullanıcılar için TTL süresince veritabanına gidilmez;
+        last_active da en fazla TTL'de bir güncellenmiş olur.
+        """
+        with self._cache_lock:
+            cached = self._user_cache.get(telegram_id)
+        if cached is None:
+            return None
+        user, cached_at = cached
+        if (time.monotonic() - cached_at < USER_CACHE_TTL
+                and self._user_matches(user, username, first_name, last_name)):
+            return user
+        return None
+    
+    @staticmethod
+    def _user_matches(user: User, username: str, first_name: str, last_name: str) -> bool:
+        """Verilen (boş olmayan) alanlar önbellekteki kullanıcıyla aynı mı?"""
+        return all(
+            new is None or new == old
+            for new, old in (
+                (username, user.username),
+                (first_name, user.first_name),
+                (last_name, user.last_name),
+            )
+        )
+    
+    def _cache_user(self, user: User):
+        """Kullanıcıyı önbelleğe al (en eski kayıt sınırı aşınca atılır)"""
+        with self._cache_lock:
+            self._user_cache.pop(user.telegram_id, None)
+            self._user_cache[user.telegram_id] = (user, time.monotonic())
+            if len(self._user_cache) > USER_CACHE_SIZE:
+                self._user_cache.pop(next(iter(self._user_cache)), None)
+    
+    def _get_cached_stat(self, user_id: int, key: Tuple) -> Any:
+        """Süresi dolmamış istatistiği döndür, yoksa _CACHE_MISS"""
+        with self._cache_lock:
+            entry = self._stats_cache.get(user_id, {}).get(key)
+        if entry is None or time.monotonic() - entry[1] >= STATS_CACHE_TTL:
+            return _CACHE_MISS
+        return entry[0]
+    
+    def _cache_stat(self, user_id: int, key: Tuple, value: Any, generation: int) -> Any:
+        """
+        İstatistiği önbelleğe al ve aynen döndür (en eski kullanıcı sınırı aşınca atılır)
+        
+        Args:
+            generation: Hesaplamaya başlamadan önce okunan _stats_generation; o zamandan
+                beri geçersiz kılma olduysa değer eskimiş olabilir ve önbelleğe yazılmaz
+        """
+        with self._cache_lock:
+            if generation != self._stats_generation:
+                return value
+            entries = self._stats_cache.pop(user_id, None) or {}
+            entries[key] = (value, time.monotonic())
+            self._stats_cache[user_id] = entries
+            if len(self._stats_cache) > STATS_CACHE_SIZE:
+                self._stats_cache.pop(next(iter(self._stats_cache)), None)
+        return value
+    
+    def _invalidate_stats(self, user_id: int):
+        """Quiz, ilerleme veya ders yazıldığında kullanıcının istatistiklerini unut"""
+        with self._cache_lock:
+            self._stats_generation += 1
+            self._stats_cache.pop(user_id, None)
+    
+    def _upsert_user(self, telegram_id: int, username: str = None,
+                     first_name: str = None, last_name: str = None) -> User:
+        """Kullanıcıyı tek ifadeyle ekle veya güncelle"""
+        upsert = _UPSERT_INSERTS.get(self.engine.dialect.name)
+        if upsert is None or not self.engine.dialect.insert_returning:
+            return self._get_or_create_user_fallback(telegram_id, username, first_name, last_name)
+        
+        # Tek ifade: yoksa ekle, varsa boş olmayan alanları ve last_active'i güncelle
+        stmt = upsert(User).values(
+            telegram_id=telegram_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                'username': func.coalesce(stmt.excluded.username, User.username),
+                'first_name': func.coalesce(stmt.excluded.first_name, User.first_name),
+                'last_name': func.coalesce(stmt.excluded.last_name, User.last_name),
+                'last_active': utcnow(),
+            },
+        ).returning(User)
         try:
-            user = session.query(User).filter_by(telegram_id=telegram_id).first()
-            
-            if not user:
-                user = User(
-                    telegram_id=telegram_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name
-                )
-                session.add(user)
-                session.commit()
-                logger.info(f"Yeni kullanıcı oluşturuldu: {telegram_id}")
-            else:
-                # Kullanıcı bilgilerini güncelle
-                user.username = username or user.username
-                user.first_name = first_name or user.first_name
-                user.last_name = last_name or user.last_name
-                user.last_active = datetime.utcnow()
-                session.commit()
+            with self._session(commit=True) as session:
+                user = session.scalars(
+                    stmt, execution_options={'populate_existing': True}
+                ).one()
+            return user
+        except SQLAlchemyError as e:
+            logger.error("Kullanıcı işlemi hatası: %s", e)
+            raise
+    
+    def _get_or_create_user_fallback(self, telegram_id: int, username: str = None,
+                                     first_name: str = None, last_name: str = None) -> User:
+        """UPSERT desteklemeyen veritabanları için SELECT + INSERT/UPDATE yolu"""
+        try:
+            with self._session(commit=True) as session:
+                user = session.query(User).filter_by(telegram_id=telegram_id).first()
+                created = user is None
+                
+                if created:
+                    user = User(
+                        telegram_id=telegram_id,
+                        username=username,
+                        first_name=first_name,
+                        last_name=last_name
+                    )
+                    session.add(user)
+                else:
+                    # Kullanıcı bilgilerini güncelle
+                    user.username = username or user.username
+                    user.first_name = first_name or user.first_name
+                    user.last_name = last_name or user.last_name
+                    user.last_active = utcnow()
             
-            # Load all attributes before expunging
-            _ = user.id, user.telegram_id, user.username, user.first_name, user.last_name
-            session.expunge(user)
+            if created:
+                logger.info("Yeni kullanıcı oluşturuldu: %s", telegram_id)
             return user
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Kullanıcı işlemi hatası: {e}")
+            logger.error("Kullanıcı işlemi hatası: %s", e)
             raise
-        finally:
-            session.close()
     
     # ============ NOT İŞLEMLERİ ============
     
@@ -100,26 +596,19 @@ class DatabaseManager:
             user_id: Kullanıcı ID'si
             category: Not kategorisi
             content: Not içeriği
-            
+        
         Returns:
             Note nesnesi (detached)
         """
-        session = self.get_session()
         try:
-            note = Note(user_id=user_id, category=category, content=content)
-            session.add(note)
-            session.commit()
-            logger.info(f"Not eklendi: kullanıcı={user_id}, kategori={category}")
-            # Load attributes before expunging
-            _ = note.id, note.category, note.content, note.created_at
-            session.expunge(note)
+            with self._session(commit=True) as session:
+                note = Note(user_id=user_id, category=category, content=content)
+                session.add(note)
+            logger.info("Not eklendi: kullanıcı=%s, kategori=%s", user_id, category)
             return note
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Not ekleme hatası: {e}")
+            logger.error("Not ekleme hatası: %s", e)
             raise
-        finally:
-            session.close()
     
     def get_notes(self, user_id: int, category: str = None) -> List[Note]:
         """
@@ -128,24 +617,20 @@ class DatabaseManager:
         Args:
             user_id: Kullanıcı ID'si
             category: Kategori filtresi (opsiyonel)
-            
+        
         Returns:
             Not listesi
         """
-        session = self.get_session()
         try:
-            query = session.query(Note).filter_by(user_id=user_id)
-            
-            if category:
-                query = query.filter_by(category=category)
-            
-            notes = query.order_by(Note.created_at.desc()).all()
-            return notes
+            with self._session() as session:
+                if category:
+                    return session.scalars(
+                        _NOTES_BY_CATEGORY, {'user_id': user_id, 'category': category}
+                    ).all()
+                return session.scalars(_NOTES_BY_USER, {'user_id': user_id}).all()
         except SQLAlchemyError as e:
-            logger.error(f"Not getirme hatası: {e}")
+            logger.error("Not getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
     
     def search_notes(self, user_id: int, keyword: str) -> List[Note]:
         """
@@ -154,27 +639,45 @@ class DatabaseManager:
         Args:
             user_id: Kullanıcı ID'si
             keyword: Arama kelimesi
-            
+        
         Returns:
             Bulunan notlar
         """
-        session = self.get_session()
         try:
-            notes = session.query(Note).filter(
-                and_(
-                    Note.user_id == user_id,
-                    or_(
-                        Note.content.contains(keyword),
-                        Note.category.contains(keyword)
+            with self._session() as session:
+                if self._notes_fts and len(keyword) >= _NOTES_FTS_MIN_LENGTH:
+                    # Kelime tek bir ifade olarak aranır; FTS sorgu sözdizimi yorumlanmaz
+                    phrase = '"' + keyword.replace('"', '""') + '"'
+                    return session.scalars(
+                        select(Note)
+                        .join(_notes_fts, _notes_fts.c.rowid == Note.id)
+                        .where(Note.user_id == user_id, _notes_fts.c.notes_fts.op('MATCH')(phrase))
+                        .order_by(Note.created_at.desc())
+                    ).all()
+                
+                if self.engine.dialect.name == 'postgresql':
+                    # ix_notes_search GIN index'i üzerinden kelime araması
+                    return session.scalars(
+                        select(Note)
+                        .where(
+                            Note.user_id == user_id,
+                            _NOTE_SEARCH_VECTOR.op('@@')(func.plainto_tsquery(_NOTE_SEARCH_CONFIG, keyword))
+                        )
+                        .order_by(Note.created_at.desc())
+                    ).all()
+                
+                return session.query(Note).filter(
+                    and_(
+                        Note.user_id == user_id,
+                        or_(
+                            Note.content.contains(keyword),
+                            Note.category.contains(keyword)
+                        )
                     )
-                )
-            ).order_by(Note.created_at.desc()).all()
-            return notes
+                ).order_by(Note.created_at.desc()).all()
         except SQLAlchemyError as e:
-            logger.error(f"Not arama hatası: {e}")
+            logger.error("Not arama hatası: %s", e)
             return []
-        finally:
-            session.close()
     
     def delete_note(self, note_id: int, user_id: int) -> bool:
         """
@@ -183,30 +686,68 @@ class DatabaseManager:
         Args:
             note_id: Not ID'si
             user_id: Kullanıcı ID'si
-            
+        
         Returns:
             Başarılı ise True
         """
-        session = self.get_session()
         try:
-            note = session.query(Note).filter_by(id=note_id, user_id=user_id).first()
-            if note:
-                session.delete(note)
-                session.commit()
-                logger.info(f"Not silindi: {note_id}")
-                return True
-            return False
+            with self._session(commit=True) as session:
+                result = session.execute(
+                    delete(Note)
+                    .where(Note.id == note_id, Note.user_id == user_id)
+                    .execution_options(synchronize_session=False)
+                )
+            if not result.rowcount:
+                return False
+            logger.info("Not silindi: %s", note_id)
+            return True
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Not silme hatası: {e}")
+            logger.error("Not silme hatası: %s", e)
             return False
-        finally:
-            session.close()
+    
+    def get_note_categories(self, user_id: int) -> List[str]:
+        """
+        Kullanıcının not kategorilerini getir
+        
+        Args:
+            user_id: Kullanıcı ID'si
+        
+        Returns:
+            Alfabetik sıralı, tekrarsız kategori listesi
+        """
+        try:
+            with self._session() as session:
+                return session.scalars(_NOTE_CATEGORIES, {'user_id': user_id}).all()
+        except SQLAlchemyError as e:
+            logger.error("Kategori getirme hatası: %s", e)
+            return []
+    
+    def count_notes(self, user_id: int, category: str = None) -> int:
+        """
+        Kullanıcının not sayısını getir
+        
+        Args:
+            user_id: Kullanıcı ID'si
+            category: Kategori filtresi (opsiyonel)
+        
+        Returns:
+            Not sayısı
+        """
+        try:
+            with self._session() as session:
+                if category:
+                    return session.scalar(
+                        _NOTE_COUNT_BY_CATEGORY, {'user_id': user_id, 'category': category}
+                    )
+                return session.scalar(_NOTE_COUNT, {'user_id': user_id})
+        except SQLAlchemyError as e:
+            logger.error("Not sayısı getirme hatası: %s", e)
+            return 0
     
     # ============ GÖREV İŞLEMLERİ ============
     
     def add_task(self, user_id: int, title: str, description: str = None,
-                priority: PriorityLevel = PriorityLevel.MEDIUM, 
+                priority: PriorityLevel = PriorityLevel.MEDIUM,
                 due_date: datetime = None) -> Task:
         """
         Görev ekle
@@ -217,32 +758,25 @@ class DatabaseManager:
             description: Görev açıklaması
             priority: Öncelik seviyesi
             due_date: Bitiş tarihi
-            
+        
         Returns:
             Task nesnesi (detached)
         """
-        session = self.get_session()
         try:
-            task = Task(
-                user_id=user_id,
-                title=title,
-                description=description,
-                priority=priority,
-                due_date=due_date
-            )
-            session.add(task)
-            session.commit()
-            logger.info(f"Görev eklendi: kullanıcı={user_id}, başlık={title}")
-            # Load attributes before expunging
-            _ = task.id, task.title, task.priority, task.due_date
-            session.expunge(task)
+            with self._session(commit=True) as session:
+                task = Task(
+                    user_id=user_id,
+                    title=title,
+                    description=description,
+                    priority=priority,
+                    due_date=due_date
+                )
+                session.add(task)
+            logger.info("Görev eklendi: kullanıcı=%s, başlık=%s", user_id, title)
             return task
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Görev ekleme hatası: {e}")
+            logger.error("Görev ekleme hatası: %s", e)
             raise
-        finally:
-            session.close()
     
     def get_tasks(self, user_id: int, include_completed: bool = False) -> List[Task]:
         """
@@ -251,24 +785,17 @@ class DatabaseManager:
         Args:
             user_id: Kullanıcı ID'si
             include_completed: Tamamlanmış görevleri dahil et
-            
+        
         Returns:
             Görev listesi
         """
-        session = self.get_session()
         try:
-            query = session.query(Task).filter_by(user_id=user_id)
-            
-            if not include_completed:
-                query = query.filter_by(is_completed=False)
-            
-            tasks = query.order_by(Task.due_date.asc()).all()
-            return tasks
+            with self._session() as session:
+                stmt = _TASKS_ALL if include_completed else _TASKS_OPEN
+                return session.scalars(stmt, {'user_id': user_id}).all()
         except SQLAlchemyError as e:
-            logger.error(f"Görev getirme hatası: {e}")
+            logger.error("Görev getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
     
     def get_today_tasks(self, user_id: int) -> List[Task]:
         """
@@ -276,29 +803,44 @@ class DatabaseManager:
         
         Args:
             user_id: Kullanıcı ID'si
-            
+        
         Returns:
             Bugünkü görevler
         """
-        session = self.get_session()
         try:
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            
-            tasks = session.query(Task).filter(
-                and_(
-                    Task.user_id == user_id,
-                    Task.is_completed == False,
-                    Task.due_date >= today_start,
-                    Task.due_date < today_end
-                )
-            ).order_by(Task.due_date.asc()).all()
-            return tasks
+            today_start, today_end = _day_bounds(date.today())
+            with self._session() as session:
+                return session.scalars(
+                    _TASKS_DUE_BETWEEN,
+                    {'user_id': user_id, 'start': today_start, 'end': today_end}
+                ).all()
         except SQLAlchemyError as e:
-            logger.error(f"Bugünkü görevleri getirme hatası: {e}")
+            logger.error("Bugünkü görevleri getirme hatası: %s", e)
+            return []
+    
+    def get_tasks_between(self, user_id: int, start: datetime, end: datetime,
+                          include_completed: bool = False) -> List[Task]:
+        """
+        Bitiş tarihi verilen aralıkta olan görevleri getir
+        
+        Args:
+            user_id: Kullanıcı ID'si
+            start: Aralık başlangıcı (dahil)
+            end: Aralık sonu (dahil)
+            include_completed: Tamamlanmış görevleri dahil et
+        
+        Returns:
+            Bitiş tarihine göre sıralı görev listesi
+        """
+        try:
+            stmt = _TASKS_DUE_IN_RANGE if include_completed else _OPEN_TASKS_DUE_IN_RANGE
+            with self._session() as session:
+                return session.scalars(
+                    stmt, {'user_id': user_id, 'start': start, 'end': end}
+                ).all()
+        except SQLAlchemyError as e:
+            logger.error("Tarih aralığındaki görevleri getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
     
     def update_task_status(self, task_id: int, user_id: int, is_completed: bool) -> bool:
         """
@@ -308,26 +850,28 @@ class DatabaseManager:
             task_id: Görev ID'si
             user_id: Kullanıcı ID'si
             is_completed: Tamamlanma durumu
-            
+        
         Returns:
             Başarılı ise True
         """
-        session = self.get_session()
         try:
-            task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
-            if task:
-                task.is_completed = is_completed
-                task.completed_at = datetime.utcnow() if is_completed else None
-                session.commit()
-                logger.info(f"Görev durumu güncellendi: {task_id}")
-                return True
-            return False
+            with self._session(commit=True) as session:
+                result = session.execute(
+                    update(Task)
+                    .where(Task.id == task_id, Task.user_id == user_id)
+                    .values(
+                        is_completed=is_completed,
+                        completed_at=utcnow() if is_completed else None
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            if not result.rowcount:
+                return False
+            logger.info("Görev durumu güncellendi: %s", task_id)
+            return True
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Görev güncelleme hatası: {e}")
+            logger.error("Görev güncelleme hatası: %s", e)
             return False
-        finally:
-            session.close()
     
     def delete_task(self, task_id: int, user_id: int) -> bool:
         """
@@ -336,25 +880,45 @@ class DatabaseManager:
         Args:
             task_id: Görev ID'si
             user_id: Kullanıcı ID'si
-            
+        
         Returns:
             Başarılı ise True
         """
-        session = self.get_session()
         try:
-            task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
-            if task:
-                session.delete(task)
-                session.commit()
-                logger.info(f"Görev silindi: {task_id}")
-                return True
-            return False
+            with self._session(commit=True) as session:
+                result = session.execute(
+                    delete(Task)
+                    .where(Task.id == task_id, Task.user_id == user_id)
+                    .execution_options(synchronize_session=False)
+                )
+            if not result.rowcount:
+                return False
+            logger.info("Görev silindi: %s", task_id)
+            return True
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Görev silme hatası: {e}")
+            logger.error("Görev silme hatası: %s", e)
             return False
-        finally:
-            session.close()
+    
+    def count_tasks(self, user_id: int, completed: bool = None) -> int:
+        """
+        Kullanıcının görev sayısını getir
+        
+        Args:
+            user_id: Kullanıcı ID'si
+            completed: Tamamlanma durumu filtresi (None ise tümü)
+        
+        Returns:
+            Görev sayısı
+        """
+        stmt = select(func.count(Task.id)).where(Task.user_id == user_id)
+        if completed is not None:
+            stmt = stmt.where(Task.is_completed == completed)
+        try:
+            with self._session() as session:
+                return session.scalar(stmt)
+        except SQLAlchemyError as e:
+            logger.error("Görev sayısı getirme hatası: %s", e)
+            return 0
     
     # ============ HATIRLATICI İŞLEMLERİ ============
     
@@ -369,32 +933,25 @@ class DatabaseManager:
             remind_at: Hatırlatma zamanı
             is_recurring: Tekrarlanan mı
             recurrence_pattern: Tekrar düzeni
-            
+        
         Returns:
             Reminder nesnesi (detached)
         """
-        session = self.get_session()
         try:
-            reminder = Reminder(
-                user_id=user_id,
-                message=message,
-                remind_at=remind_at,
-                is_recurring=is_recurring,
-                recurrence_pattern=recurrence_pattern
-            )
-            session.add(reminder)
-            session.commit()
-            logger.info(f"Hatırlatıcı eklendi: kullanıcı={user_id}, zaman={remind_at}")
-            # Load attributes before expunging
-            _ = reminder.id, reminder.message, reminder.remind_at
-            session.expunge(reminder)
+            with self._session(commit=True) as session:
+                reminder = Reminder(
+                    user_id=user_id,
+                    message=message,
+                    remind_at=remind_at,
+                    is_recurring=is_recurring,
+                    recurrence_pattern=recurrence_pattern
+                )
+                session.add(reminder)
+            logger.info("Hatırlatıcı eklendi: kullanıcı=%s, zaman=%s", user_id, remind_at)
             return reminder
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Hatırlatıcı ekleme hatası: {e}")
+            logger.error("Hatırlatıcı ekleme hatası: %s", e)
             raise
-        finally:
-            session.close()
     
     def get_pending_reminders(self) -> List[Reminder]:
         """
@@ -403,21 +960,18 @@ class DatabaseManager:
         Returns:
             Hatırlatıcı listesi
         """
-        session = self.get_session()
         try:
-            now = datetime.utcnow()
-            reminders = session.query(Reminder).filter(
-                and_(
-                    Reminder.is_sent == False,
-                    Reminder.remind_at <= now
-                )
-            ).all()
-            return reminders
+            with self._session() as session:
+                now = utcnow()
+                return session.query(Reminder).filter(
+                    and_(
+                        Reminder.is_sent == False,
+                        Reminder.remind_at <= now
+                    )
+                ).all()
         except SQLAlchemyError as e:
-            logger.error(f"Hatırlatıcı getirme hatası: {e}")
+            logger.error("Hatırlatıcı getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
     
     def mark_reminder_sent(self, reminder_id: int) -> bool:
         """
@@ -425,25 +979,94 @@ class DatabaseManager:
         
         Args:
             reminder_id: Hatırlatıcı ID'si
-            
+        
         Returns:
             Başarılı ise True
         """
-        session = self.get_session()
         try:
-            reminder = session.query(Reminder).filter_by(id=reminder_id).first()
-            if reminder:
-                reminder.is_sent = True
-                session.commit()
-                logger.info(f"Hatırlatıcı gönderildi işaretlendi: {reminder_id}")
-                return True
+            with self._session(commit=True) as session:
+                result = session.execute(
+                    update(Reminder)
+                    .where(Reminder.id == reminder_id)
+                    .values(is_sent=True)
+                    .execution_options(synchronize_session=False)
+                )
+            if not result.rowcount:
+                return False
+            logger.info("Hatırlatıcı gönderildi işaretlendi: %s", reminder_id)
+            return True
+        except SQLAlchemyError as e:
+            logger.error("Hatırlatıcı işaretleme hatası: %s", e)
             return False
+    
+    def claim_pending_reminders(self) -> List[Row]:
+        """
+        Zamanı gelmiş hatırlatıcıları gönderildi olarak işaretleyip döndür
+        
+        UPDATE ... RETURNING ile tek ifadede yapılır; aynı hatırlatıcıyı iki
+        kontrol döngüsünün birden alması engellenir. Gönderim başarısız olursa
+        release_reminder ile geri bırakılmalıdır.
+        
+        Alıcının Telegram ID'si aynı ifadede ilişkili alt sorguyla alınır;
+        kullanıcısı silinmiş hatırlatıcılar sahiplenilmez.
+        
+        Returns:
+            Sahiplenilen hatırlatıcılar (id, user_id, telegram_id, message, remind_at satırları)
+        """
+        pending = and_(
+            Reminder.is_sent == False,
+            Reminder.remind_at <= utcnow(),
+            _REMINDER_HAS_USER
+        )
+        columns = (
+            Reminder.id, Reminder.user_id, _REMINDER_TELEGRAM_ID, Reminder.message, Reminder.remind_at
+        )
+        try:
+            with self._session(commit=True) as session:
+                if self.engine.dialect.update_returning:
+                    return session.execute(
+                        update(Reminder)
+                        .where(pending)
+                        .values(is_sent=True)
+                        .returning(*columns)
+                        .execution_options(synchronize_session=False)
+                    ).all()
+                
+                reminders = session.execute(select(*columns).where(pending)).all()
+                if reminders:
+                    session.execute(
+                        update(Reminder)
+                        .where(Reminder.id.in_([r.id for r in reminders]), Reminder.is_sent == False)
+                        .values(is_sent=True)
+                        .execution_options(synchronize_session=False)
+                    )
+                return reminders
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Hatırlatıcı işaretleme hatası: {e}")
+            logger.error("Hatırlatıcı sahiplenme hatası: %s", e)
+            return []
+    
+    def release_reminder(self, reminder_id: int) -> bool:
+        """
+        Gönderilemeyen hatırlatıcıyı tekrar bekleyen duruma al
+        
+        Args:
+            reminder_id: Hatırlatıcı ID'si
+        
+        Returns:
+            Başarılı ise True
+        """
+        try:
+            with self._session(commit=True) as session:
+                result = session.execute(
+                    update(Reminder)
+                    .where(Reminder.id == reminder_id)
+                    .values(is_sent=False)
+                    .execution_options(synchronize_session=False)
+                )
+            return bool(result.rowcount)
+        except SQLAlchemyError as e:
+            logger.error("Hatırlatıcı geri bırakma hatası: %s", e)
             return False
-        finally:
-            session.close()
     
     # ============ SOHBET GEÇMİŞİ İŞLEMLERİ ============
     
@@ -455,99 +1078,128 @@ class DatabaseManager:
             user_id: Kullanıcı ID'si
             role: Rol ('user' veya 'assistant')
             message: Mesaj içeriği
-            
+        
         Returns:
             ChatHistory nesnesi (detached)
         """
-        session = self.get_session()
         try:
-            chat = ChatHistory(user_id=user_id, role=role, message=message)
-            session.add(chat)
-            session.commit()
+            with self._session(commit=True) as session:
+                chat = ChatHistory(user_id=user_id, role=role, message=message)
+                session.add(chat)
             
-            # Eski mesajları temizle
-            self._cleanup_old_messages(session, user_id)
-            
-            session.expunge(chat)
+            # Eski mesajlar zamanlayıcıdaki cleanup_chat_history ile toplu temizlenir
+            self._schedule_chat_cleanup(user_id)
             return chat
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Sohbet mesajı ekleme hatası: {e}")
+            logger.error("Sohbet mesajı ekleme hatası: %s", e)
+            raise
+    
+    def add_chat_messages(self, user_id: int, messages: List[Tuple[str, str]]):
+        """
+        Birden fazla sohbet mesajını tek INSERT ile ekle (ör. kullanıcı mesajı + AI yanıtı)
+        
+        Args:
+            user_id: Kullanıcı ID'si
+            messages: Sırasıyla (rol, mesaj) çiftleri
+        """
+        if not messages:
+            return
+        # Aynı anda eklenen mesajların sırası created_at ile korunur
+        now = utcnow()
+        rows = [
+            {
+                'user_id': user_id,
+                'role': role,
+                'message': message,
+                'created_at': now + timedelta(microseconds=i),
+            }
+            for i, (role, message) in enumerate(messages)
+        ]
+        try:
+            with self._session(commit=True) as session:
+                session.execute(insert(ChatHistory), rows)
+            
+            self._schedule_chat_cleanup(user_id)
+        except SQLAlchemyError as e:
+            logger.error("Sohbet mesajı ekleme hatası: %s", e)
             raise
-        finally:
-            session.close()
     
-    def get_chat_history(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_chat_history(self, user_id: int, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
         """
         Sohbet geçmişini getir
         
         Args:
             user_id: Kullanıcı ID'si
             limit: Maksimum mesaj sayısı
-            
+        
         Returns:
-            Sohbet geçmişi listesi
+            Sohbet geçmişi listesi; veritabanı hatasında None (boş geçmişten ayırt
+            edilebilsin ve çağıran taraf hatalı sonucu önbelleğe almasın diye)
         """
-        session = self.get_session()
         try:
-            messages = session.query(ChatHistory).filter_by(
-                user_id=user_id
-            ).order_by(
-                ChatHistory.created_at.desc()
-            ).limit(limit).all()
-            
-            # Eski mesajlardan yeniye sıralama
-            messages.reverse()
-            
-            # Gemini API format: role must be 'user' or 'model' 
-            # Map 'assistant' -> 'model' for compatibility
-            result = []
-            for msg in messages:
-                # Normalize role to Gemini-compatible values
-                if msg.role == 'assistant':
-                    role = 'model'
-                elif msg.role == 'user':
-                    role = 'user'
-                elif msg.role == 'model':
-                    role = 'model'
-                else:
-                    # Skip invalid roles to prevent API errors
-                    logger.warning(f"Skipping message with invalid role: {msg.role}")
-                    continue
-                
-                result.append({
-                    'role': role,
-                    'parts': [{'text': msg.message}]
-                })
-            
-            return result
+            with self._session() as session:
+                rows = session.execute(_CHAT_HISTORY, {'user_id': user_id, 'limit': limit}).all()
         except SQLAlchemyError as e:
-            logger.error(f"Sohbet geçmişi getirme hatası: {e}")
-            return []
-        finally:
-            session.close()
+            logger.error("Sohbet geçmişi getirme hatası: %s", e)
+            return None
+        
+        # Gemini API format: role must be 'user' or 'model'
+        invalid = [role for role, _ in rows if role not in _GEMINI_ROLES]
+        if invalid:
+            # Skip invalid roles to prevent API errors
+            logger.warning("Skipping messages with invalid roles: %s", invalid)
+        return [
+            {'role': _GEMINI_ROLES[role], 'parts': [{'text': message}]}
+            for role, message in rows
+            if role in _GEMINI_ROLES
+        ]
     
-    def _cleanup_old_messages(self, session: Session, user_id: int):
-        """Eski mesajları temizle"""
+    def _schedule_chat_cleanup(self, user_id: int):
+        """Kullanıcıyı bir sonraki cleanup_chat_history çalışmasında temizlenmek üzere işaretle"""
+        with self._chat_cleanup_lock:
+            self._chat_cleanup_users.add(user_id)
+    
+    def cleanup_chat_history(self):
+        """
+        Son temizlikten bu yana mesaj eklenen kullanıcıların eski mesajlarını sil
+        
+        Zamanlayıcı thread'inde CHAT_CLEANUP_INTERVAL aralıkla çalışır; böylece
+        temizliğin maliyeti mesaj yazan kullanıcının isteğine binmez.
+        """
+        with self._chat_cleanup_lock:
+            user_ids = self._chat_cleanup_users
+            self._chat_cleanup_users = set()
+        if not user_ids:
+            return
+        
+        with self._session() as session:
+            self._cleanup_old_messages(session, user_ids)
+    
+    def _cleanup_old_messages(self, session: Session, user_ids: Iterable[int]):
+        """Eski mesajları temizle (her kullanıcının en yeni MAX_CHAT_HISTORY mesajı dışındakileri tek DELETE ile sil)"""
         try:
-            count = session.query(ChatHistory).filter_by(user_id=user_id).count()
-            
-            if count > MAX_CHAT_HISTORY:
-                # En eski mesajları sil
-                delete_count = count - MAX_CHAT_HISTORY
-                old_messages = session.query(ChatHistory).filter_by(
-                    user_id=user_id
-                ).order_by(
-                    ChatHistory.created_at.asc()
-                ).limit(delete_count).all()
-                
-                for msg in old_messages:
-                    session.delete(msg)
-                
-                session.commit()
-                logger.info(f"Eski mesajlar temizlendi: {delete_count} adet")
+            ranked = select(
+                ChatHistory.id,
+                func.row_number().over(
+                    partition_by=ChatHistory.user_id,
+                    order_by=(ChatHistory.created_at.desc(), ChatHistory.id.desc())
+                ).label('rank')
+            ).where(
+                ChatHistory.user_id.in_(list(user_ids))
+            ).subquery()
+            # Silinecek id'ler ayrı bir türetilmiş tabloya alınır; MySQL DELETE'in hedef
+            # tablosunu aynı ifadedeki alt sorguda doğrudan okumaya izin vermez
+            stale = select(ranked.c.id).where(ranked.c.rank > MAX_CHAT_HISTORY).subquery()
+            result = session.execute(
+                delete(ChatHistory)
+                .where(ChatHistory.id.in_(select(stale.c.id)))
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount:
+                logger.info("Eski mesajlar temizlendi: %s adet", result.rowcount)
         except SQLAlchemyError as e:
-            logger.error(f"Mesaj temizleme hatası: {e}")
+            logger.error("Mesaj temizleme hatası: %s", e)
 
     # ============ DERS YÖNETİMİ İŞLEMLERİ ============
 
@@ -563,27 +1215,24 @@ class DatabaseManager:
         Returns:
             Yeni kurs ID'si
         """
-        session = self.get_session()
         try:
-            # Aynı kullanıcı için aynı isimde ders varsa güncelle
-            existing = session.query(Course).filter_by(user_id=user_id, name=name).first()
-            if existing:
-                existing.description = description
-                session.commit()
-                course_id = existing.id
-            else:
-                course = Course(user_id=user_id, name=name, description=description)
-                session.add(course)
-                session.commit()
-                course_id = course.id
-            logger.info(f"Ders eklendi/güncellendi: kullanıcı={user_id}, ders={name}")
+            with self._session(commit=True) as session:
+                # Aynı kullanıcı için aynı isimde ders varsa güncelle
+                existing = session.query(Course).filter_by(user_id=user_id, name=name).first()
+                if existing:
+                    existing.description = description
+                    course_id = existing.id
+                else:
+                    course = Course(user_id=user_id, name=name, description=description)
+                    session.add(course)
+                    session.flush()
+                    course_id = course.id
+            self._invalidate_stats(user_id)
+            logger.info("Ders eklendi/güncellendi: kullanıcı=%s, ders=%s", user_id, name)
             return course_id
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Ders ekleme hatası: {e}")
+            logger.error("Ders ekleme hatası: %s", e)
             raise
-        finally:
-            session.close()
 
     def add_topic(self, course_id: int, title: str, week: int) -> int:
         """
@@ -597,29 +1246,158 @@ class DatabaseManager:
         Returns:
             Yeni konu ID'si
         """
-        session = self.get_session()
-        try:
-            # Aynı kurs için aynı başlıkta konu varsa atla
-            existing = session.query(Topic).filter_by(course_id=course_id, title=title).first()
-            if existing:
-                return existing.id
-            topic = Topic(course_id=course_id, title=title, week_number=week)
-            session.add(topic)
-            # Kursun total_topics sayısını güncelle
-            course = session.query(Course).filter_by(id=course_id).first()
-            if course:
-                count = session.query(Topic).filter_by(course_id=course_id).count()
-                course.total_topics = count + 1
-            session.commit()
-            topic_id = topic.id
-            logger.info(f"Konu eklendi: kurs={course_id}, başlık={title}")
+        try:
+            with self._session(commit=True) as session:
+                # Aynı kurs için aynı başlıkta konu varsa atla
+                existing = session.query(Topic).filter_by(course_id=course_id, title=title).first()
+                if existing:
+                    return existing.id
+                topic = Topic(course_id=course_id, title=title, week_number=week)
+                session.add(topic)
+                session.flush()
+                topic_id = topic.id
+                user_id = self._refresh_topic_total(session, course_id)
+            self._invalidate_stats(user_id)
+            logger.info("Konu eklendi: kurs=%s, başlık=%s", course_id, title)
             return topic_id
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Konu ekleme hatası: {e}")
+            logger.error("Konu ekleme hatası: %s", e)
+            raise
+
+    def bulk_add_topics(self, course_id: int, topics: List[Tuple[str, int]]) -> int:
+        """
+        Kursa birden fazla konuyu tek INSERT ile ekle
+
+        add_topic ile aynı kurallar geçerlidir (kursta zaten olan başlık atlanır);
+        total_topics konu başına değil, en sonda tek UPDATE ile güncellenir.
+
+        Args:
+            course_id: Kurs ID'si
+            topics: (konu başlığı, hafta numarası) çiftleri
+
+        Returns:
+            Eklenen konu sayısı
+        """
+        try:
+            with self._session(commit=True) as session:
+                have = set(session.scalars(
+                    select(Topic.title).where(Topic.course_id == course_id)
+                ))
+                rows = []
+                for title, week in topics:
+                    if title not in have:
+                        have.add(title)
+                        rows.append({'course_id': course_id, 'title': title, 'week_number': week})
+                if not rows:
+                    return 0
+                session.execute(insert(Topic), rows)
+                user_id = self._refresh_topic_total(session, course_id)
+            self._invalidate_stats(user_id)
+            logger.info("Konular eklendi: kurs=%s, yeni konu=%s", course_id, len(rows))
+            return len(rows)
+        except SQLAlchemyError as e:
+            logger.error("Toplu konu ekleme hatası: %s", e)
+            raise
+
+    def _refresh_topic_total(self, session: Session, course_id: int) -> Optional[int]:
+        """
+        Kursun total_topics sayısını gerçek konu sayısına çek (internal)
+
+        Sütunun varsayılanı 10 olduğundan +N yerine konuların sayımı yazılır.
+        Destekleyen veritabanlarında kursun user_id'si aynı UPDATE'ten döner.
+
+        Returns:
+            Kursun user_id'si (kurs yoksa None)
+        """
+        stmt = (
+            update(Course)
+            .where(Course.id == course_id)
+            .values(
+                total_topics=select(func.count(Topic.id))
+                .where(Topic.course_id == course_id)
+                .scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if self.engine.dialect.update_returning:
+            return session.scalar(stmt.returning(Course.user_id))
+        session.execute(stmt)
+        return session.scalar(select(Course.user_id).where(Course.id == course_id))
+
+    def add_courses_with_topics(self, user_id: int, courses: List[Dict[str, Any]]) -> List[int]:
+        """
+        Dersleri konularıyla birlikte tek işlemde ekle
+
+        add_course/add_topic ile aynı kurallar geçerlidir (aynı isimli ders
+        güncellenir, kursta zaten olan konu atlanır); ancak ders ve konu başına
+        ayrı işlem yerine her adım tek bir toplu sorguyla yapılır.
+
+        Args:
+            user_id: Kullanıcı ID'si
+            courses: {"name": ..., "description": ..., "topics": [konu başlıkları]}
+                     sözlükleri; konuların hafta numarası sıralarından gelir
+
+        Returns:
+            courses ile aynı sırada kurs ID'leri
+        """
+        if not courses:
+            return []
+        names = [c["name"] for c in courses]
+        try:
+            with self._session(commit=True) as session:
+                existing = dict(session.execute(
+                    select(Course.name, Course.id)
+                    .where(Course.user_id == user_id, Course.name.in_(names))
+                    .order_by(Course.id.desc())
+                ).all())
+
+                if existing:
+                    session.execute(update(Course), [
+                        {'id': existing[c["name"]], 'description': c["description"]}
+                        for c in courses if c["name"] in existing
+                    ])
+                new_rows = [
+                    {'user_id': user_id, 'name': c["name"], 'description': c["description"]}
+                    for c in courses if c["name"] not in existing
+                ]
+                if new_rows:
+                    session.execute(insert(Course), new_rows)
+                    existing.update(session.execute(
+                        select(Course.name, Course.id)
+                        .where(Course.user_id == user_id, Course.name.in_([r['name'] for r in new_rows]))
+                        .order_by(Course.id.desc())
+                    ).all())
+                course_ids = [existing[name] for name in names]
+
+                have = set(session.execute(
+                    select(Topic.course_id, Topic.title).where(Topic.course_id.in_(course_ids))
+                ).all())
+                topic_rows = []
+                for course_id, c in zip(course_ids, courses):
+                    for week, title in enumerate(c["topics"], 1):
+                        if (course_id, title) not in have:
+                            have.add((course_id, title))
+                            topic_rows.append({'course_id': course_id, 'title': title, 'week_number': week})
+                if topic_rows:
+                    session.execute(insert(Topic), topic_rows)
+                    # add_topic ile aynı şekilde total_topics gerçek konu sayısına çekilir
+                    session.execute(
+                        update(Course)
+                        .where(Course.id.in_({r['course_id'] for r in topic_rows}))
+                        .values(
+                            total_topics=select(func.count(Topic.id))
+                            .where(Topic.course_id == Course.id)
+                            .scalar_subquery()
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+            self._invalidate_stats(user_id)
+            logger.info("Dersler yüklendi: kullanıcı=%s, ders=%s, yeni konu=%s",
+                        user_id, len(course_ids), len(topic_rows))
+            return course_ids
+        except SQLAlchemyError as e:
+            logger.error("Toplu ders ekleme hatası: %s", e)
             raise
-        finally:
-            session.close()
 
     def get_user_courses(self, user_id: int) -> List[Dict[str, Any]]:
         """
@@ -631,28 +1409,40 @@ class DatabaseManager:
         Returns:
             Ders listesi (dict)
         """
-        session = self.get_session()
-        try:
-            courses = session.query(Course).filter_by(user_id=user_id).order_by(Course.id).all()
-            result = []
-            for c in courses:
-                # Tamamlanan konu sayısını hesapla
-                completed = session.query(Topic).filter_by(course_id=c.id, is_completed=True).count()
-                total = session.query(Topic).filter_by(course_id=c.id).count()
-                result.append({
-                    'id': c.id,
-                    'name': c.name,
-                    'description': c.description,
-                    'total_topics': total,
-                    'completed_topics': completed,
-                    'created_at': c.created_at,
-                })
-            return result
-        except SQLAlchemyError as e:
-            logger.error(f"Ders getirme hatası: {e}")
+        cached = self._get_cached_stat(user_id, ('courses',))
+        if cached is not _CACHE_MISS:
+            return cached
+        generation = self._stats_generation
+        try:
+            with self._session() as session:
+                # Toplam ve tamamlanan konu sayıları tek GROUP BY sorgusunda hesaplanır
+                rows = (
+                    session.query(
+                        Course,
+                        func.count(Topic.id),
+                        func.coalesce(func.sum(case((Topic.is_completed == True, 1), else_=0)), 0),
+                    )
+                    .outerjoin(Topic, Topic.course_id == Course.id)
+                    .filter(Course.user_id == user_id)
+                    .group_by(Course.id)
+                    .order_by(Course.id)
+                    .all()
+                )
+                courses = [
+                    {
+                        'id': c.id,
+                        'name': c.name,
+                        'description': c.description,
+                        'total_topics': total,
+                        'completed_topics': completed,
+                        'created_at': c.created_at,
+                    }
+                    for c, total, completed in rows
+                ]
+            return self._cache_stat(user_id, ('courses',), courses, generation)
+        except SQLAlchemyError as e:
+            logger.error("Ders getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
 
     def get_course_topics(self, course_id: int) -> List[Dict[str, Any]]:
         """
@@ -664,24 +1454,22 @@ class DatabaseManager:
         Returns:
             Konu listesi (dict)
         """
-        session = self.get_session()
         try:
-            topics = session.query(Topic).filter_by(course_id=course_id).order_by(Topic.week_number).all()
-            return [
-                {
-                    'id': t.id,
-                    'title': t.title,
-                    'week_number': t.week_number,
-                    'is_completed': t.is_completed,
-                    'completed_at': t.completed_at,
-                }
-                for t in topics
-            ]
+            with self._session() as session:
+                topics = session.query(Topic).filter_by(course_id=course_id).order_by(Topic.week_number).all()
+                return [
+                    {
+                        'id': t.id,
+                        'title': t.title,
+                        'week_number': t.week_number,
+                        'is_completed': t.is_completed,
+                        'completed_at': t.completed_at,
+                    }
+                    for t in topics
+                ]
         except SQLAlchemyError as e:
-            logger.error(f"Konu getirme hatası: {e}")
+            logger.error("Konu getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
 
     def get_next_topic(self, user_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -693,30 +1481,28 @@ class DatabaseManager:
         Returns:
             Konu bilgisi dict veya None
         """
-        session = self.get_session()
         try:
-            topic = (
-                session.query(Topic, Course)
-                .join(Course, Topic.course_id == Course.id)
-                .filter(Course.user_id == user_id, Topic.is_completed == False)
-                .order_by(Course.id, Topic.week_number)
-                .first()
-            )
-            if topic:
-                t, c = topic
-                return {
-                    'topic_id': t.id,
-                    'topic_title': t.title,
-                    'week_number': t.week_number,
-                    'course_id': c.id,
-                    'course_name': c.name,
-                }
-            return None
+            with self._session() as session:
+                topic = (
+                    session.query(Topic, Course)
+                    .join(Course, Topic.course_id == Course.id)
+                    .filter(Course.user_id == user_id, Topic.is_completed == False)
+                    .order_by(Course.id, Topic.week_number)
+                    .first()
+                )
+                if topic:
+                    t, c = topic
+                    return {
+                        'topic_id': t.id,
+                        'topic_title': t.title,
+                        'week_number': t.week_number,
+                        'course_id': c.id,
+                        'course_name': c.name,
+                    }
+                return None
         except SQLAlchemyError as e:
-            logger.error(f"Sıradaki konu getirme hatası: {e}")
+            logger.error("Sıradaki konu getirme hatası: %s", e)
             return None
-        finally:
-            session.close()
 
     def get_next_topics(self, user_id: int, limit: int = 3) -> List[Dict[str, Any]]:
         """
@@ -729,31 +1515,29 @@ class DatabaseManager:
         Returns:
             Konu listesi (dict)
         """
-        session = self.get_session()
         try:
-            rows = (
-                session.query(Topic, Course)
-                .join(Course, Topic.course_id == Course.id)
-                .filter(Course.user_id == user_id, Topic.is_completed == False)
-                .order_by(Course.id, Topic.week_number)
-                .limit(limit)
-                .all()
-            )
-            return [
-                {
-                    'topic_id': t.id,
-                    'topic_title': t.title,
-                    'week_number': t.week_number,
-                    'course_id': c.id,
-                    'course_name': c.name,
-                }
-                for t, c in rows
-            ]
+            with self._session() as session:
+                rows = (
+                    session.query(Topic, Course)
+                    .join(Course, Topic.course_id == Course.id)
+                    .filter(Course.user_id == user_id, Topic.is_completed == False)
+                    .order_by(Course.id, Topic.week_number)
+                    .limit(limit)
+                    .all()
+                )
+                return [
+                    {
+                        'topic_id': t.id,
+                        'topic_title': t.title,
+                        'week_number': t.week_number,
+                        'course_id': c.id,
+                        'course_name': c.name,
+                    }
+                    for t, c in rows
+                ]
         except SQLAlchemyError as e:
-            logger.error(f"Sıradaki konular getirme hatası: {e}")
+            logger.error("Sıradaki konular getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
 
     def mark_topic_completed(self, user_id: int, course_name: str, topic_title: str) -> bool:
         """
@@ -767,39 +1551,34 @@ class DatabaseManager:
         Returns:
             Başarılı ise True
         """
-        session = self.get_session()
         try:
-            course = session.query(Course).filter(
-                Course.user_id == user_id,
-                Course.name.ilike(f"%{course_name}%")
-            ).first()
-            if not course:
-                return False
-            topic = session.query(Topic).filter(
-                Topic.course_id == course.id,
-                Topic.title.ilike(f"%{topic_title}%")
-            ).first()
-            if not topic:
-                return False
-            if not topic.is_completed:
-                topic.is_completed = True
-                topic.completed_at = datetime.utcnow()
-                # completed_topics sayısını güncelle (is_completed True yapıldıktan sonra say)
-                completed_count = session.query(Topic).filter_by(
-                    course_id=course.id, is_completed=True
-                ).count()
-                course.completed_topics = completed_count
-                # Çalışma ilerlemesini güncelle
-                self._update_study_progress(session, user_id, course.id)
-                session.commit()
-                logger.info(f"Konu tamamlandı: kullanıcı={user_id}, konu={topic_title}")
+            with self._session(commit=True) as session:
+                # Önce index'li tam eşleşme (büyük/küçük harf duyarsız), bulunamazsa kısmi eşleşme
+                course = session.query(Course).filter(
+                    Course.user_id == user_id,
+                    func.lower(Course.name) == func.lower(course_name)
+                ).first() or session.query(Course).filter(
+                    Course.user_id == user_id,
+                    Course.name.ilike(f"%{course_name}%")
+                ).first()
+                if not course:
+                    return False
+                topic = session.query(Topic).filter(
+                    Topic.course_id == course.id,
+                    func.lower(Topic.title) == func.lower(topic_title)
+                ).first() or session.query(Topic).filter(
+                    Topic.course_id == course.id,
+                    Topic.title.ilike(f"%{topic_title}%")
+                ).first()
+                if not topic:
+                    return False
+                self._complete_topic(session, user_id, course.id, topic.id)
+            self._invalidate_stats(user_id)
+            logger.info("Konu tamamlandı: kullanıcı=%s, konu=%s", user_id, topic_title)
             return True
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Konu tamamlama hatası: {e}")
+            logger.error("Konu tamamlama hatası: %s", e)
             return False
-        finally:
-            session.close()
 
     def mark_topic_completed_by_id(self, user_id: int, topic_id: int) -> bool:
         """
@@ -812,57 +1591,95 @@ class DatabaseManager:
         Returns:
             Başarılı ise True
         """
-        session = self.get_session()
         try:
-            topic = session.query(Topic).filter_by(id=topic_id).first()
-            if not topic:
-                return False
-            course = session.query(Course).filter_by(id=topic.course_id, user_id=user_id).first()
-            if not course:
-                return False
-            if not topic.is_completed:
-                topic.is_completed = True
-                topic.completed_at = datetime.utcnow()
-                completed_count = session.query(Topic).filter_by(
-                    course_id=course.id, is_completed=True
-                ).count()
-                course.completed_topics = completed_count
-                self._update_study_progress(session, user_id, course.id)
-                session.commit()
+            with self._session(commit=True) as session:
+                # Konu kullanıcının bir dersine ait mi? (konu + ders tek sorguda)
+                course_id = session.scalar(
+                    select(Topic.course_id)
+                    .join(Course, Topic.course_id == Course.id)
+                    .where(Topic.id == topic_id, Course.user_id == user_id)
+                )
+                if course_id is None:
+                    return False
+                self._complete_topic(session, user_id, course_id, topic_id)
+            self._invalidate_stats(user_id)
             return True
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Konu tamamlama hatası: {e}")
+            logger.error("Konu tamamlama hatası: %s", e)
             return False
-        finally:
-            session.close()
+
+    def _complete_topic(self, session: Session, user_id: int, course_id: int, topic_id: int):
+        """Konuyu tamamla; daha önce tamamlanmadıysa ders sayacını ve ilerlemeyi artır (internal)"""
+        result = session.execute(
+            update(Topic)
+            .where(Topic.id == topic_id, Topic.is_completed == False)
+            .values(is_completed=True, completed_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            return  # Zaten tamamlanmış
+        # Tamamlananları yeniden saymak yerine sayacı veritabanında artır
+        session.execute(
+            update(Course)
+            .where(Course.id == course_id)
+            .values(completed_topics=Course.completed_topics + 1)
+            .execution_options(synchronize_session=False)
+        )
+        self._update_study_progress(session, user_id, course_id)
 
     def _update_study_progress(self, session: Session, user_id: int, course_id: int):
         """Çalışma ilerlemesini güncelle (internal)"""
         try:
             today = date.today()
-            progress = session.query(StudyProgress).filter_by(
-                user_id=user_id, course_id=course_id
-            ).first()
-            if not progress:
-                progress = StudyProgress(
-                    user_id=user_id,
-                    course_id=course_id,
-                    last_study_date=today,
-                    streak_days=1
-                )
-                session.add(progress)
-            else:
-                if progress.last_study_date == today:
-                    pass  # Aynı gün, streak değişmez
-                elif progress.last_study_date == today - timedelta(days=1):
-                    progress.streak_days += 1
-                    progress.last_study_date = today
-                else:
-                    progress.streak_days = 1
-                    progress.last_study_date = today
+            upsert = _UPSERT_INSERTS.get(self.engine.dialect.name)
+            if upsert is None:
+                self._update_study_progress_fallback(session, user_id, course_id, today)
+                return
+            
+            # Tek ifade: kayıt yoksa streak 1 ile ekle; varsa aynı gün değişmez,
+            # dün çalışıldıysa streak artar, aksi halde 1'e döner
+            stmt = upsert(StudyProgress).values(
+                user_id=user_id,
+                course_id=course_id,
+                last_study_date=today,
+                streak_days=1
+            )
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=[StudyProgress.user_id, StudyProgress.course_id],
+                set_={
+                    'streak_days': case(
+                        (StudyProgress.last_study_date == today, StudyProgress.streak_days),
+                        (StudyProgress.last_study_date == today - timedelta(days=1), StudyProgress.streak_days + 1),
+                        else_=1
+                    ),
+                    'last_study_date': today,
+                },
+            ))
         except SQLAlchemyError as e:
-            logger.error(f"Çalışma ilerlemesi güncelleme hatası: {e}")
+            logger.error("Çalışma ilerlemesi güncelleme hatası: %s", e)
+
+    def _update_study_progress_fallback(self, session: Session, user_id: int, course_id: int, today: date):
+        """UPSERT desteklemeyen veritabanları için SELECT + INSERT/UPDATE yolu"""
+        progress = session.query(StudyProgress).filter_by(
+            user_id=user_id, course_id=course_id
+        ).first()
+        if not progress:
+            progress = StudyProgress(
+                user_id=user_id,
+                course_id=course_id,
+                last_study_date=today,
+                streak_days=1
+            )
+            session.add(progress)
+        else:
+            if progress.last_study_date == today:
+                pass  # Aynı gün, streak değişmez
+            elif progress.last_study_date == today - timedelta(days=1):
+                progress.streak_days += 1
+                progress.last_study_date = today
+            else:
+                progress.streak_days = 1
+                progress.last_study_date = today
 
     def add_quiz_result(self, user_id: int, topic_id: int, score: int, total: int):
         """
@@ -874,22 +1691,19 @@ class DatabaseManager:
             score: Doğru sayısı
             total: Toplam soru sayısı
         """
-        session = self.get_session()
         try:
-            quiz = Quiz(
-                user_id=user_id,
-                topic_id=topic_id,
-                score=score,
-                total_questions=total
-            )
-            session.add(quiz)
-            session.commit()
-            logger.info(f"Quiz sonucu kaydedildi: kullanıcı={user_id}, skor={score}/{total}")
+            with self._session(commit=True) as session:
+                quiz = Quiz(
+                    user_id=user_id,
+                    topic_id=topic_id,
+                    score=score,
+                    total_questions=total
+                )
+                session.add(quiz)
+            self._invalidate_stats(user_id)
+            logger.info("Quiz sonucu kaydedildi: kullanıcı=%s, skor=%s/%s", user_id, score, total)
         except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Quiz sonucu kaydetme hatası: {e}")
-        finally:
-            session.close()
+            logger.error("Quiz sonucu kaydetme hatası: %s", e)
 
     def get_avg_quiz_score(self, user_id: int, course_id: int) -> Optional[float]:
         """
@@ -902,29 +1716,20 @@ class DatabaseManager:
         Returns:
             Yüzde olarak ortalama skor veya None
         """
-        session = self.get_session()
+        key = ('avg_quiz_score', course_id)
+        cached = self._get_cached_stat(user_id, key)
+        if cached is not _CACHE_MISS:
+            return cached
+        generation = self._stats_generation
         try:
-            topic_ids = [
-                t.id for t in session.query(Topic).filter_by(course_id=course_id).all()
-            ]
-            if not topic_ids:
-                return None
-            quizzes = session.query(Quiz).filter(
-                Quiz.user_id == user_id,
-                Quiz.topic_id.in_(topic_ids),
-                Quiz.total_questions > 0
-            ).all()
-            if not quizzes:
-                return None
-            total_pct = sum(
-                (q.score / q.total_questions) * 100 for q in quizzes
-            )
-            return total_pct / len(quizzes)
+            with self._session() as session:
+                # Ortalama veritabanında hesaplanır; quiz yoksa AVG NULL döner
+                avg = session.scalar(_QUIZ_AVG_PCT, {'user_id': user_id, 'course_id': course_id})
+            # PostgreSQL NUMERIC ortalamayı Decimal döndürür
+            return self._cache_stat(user_id, key, float(avg) if avg is not None else None, generation)
         except SQLAlchemyError as e:
-            logger.error(f"Quiz ortalaması getirme hatası: {e}")
+            logger.error("Quiz ortalaması getirme hatası: %s", e)
             return None
-        finally:
-            session.close()
 
     def get_streak(self, user_id: int) -> int:
         """
@@ -936,17 +1741,18 @@ class DatabaseManager:
         Returns:
             Streak gün sayısı
         """
-        session = self.get_session()
+        cached = self._get_cached_stat(user_id, ('streak',))
+        if cached is not _CACHE_MISS:
+            return cached
+        generation = self._stats_generation
         try:
-            progresses = session.query(StudyProgress).filter_by(user_id=user_id).all()
-            if not progresses:
-                return 0
-            return max(p.streak_days for p in progresses)
+            with self._session() as session:
+                # En yüksek değer veritabanında hesaplanır; kayıt yoksa MAX NULL döner
+                streak = session.scalar(_MAX_STREAK, {'user_id': user_id})
+            return self._cache_stat(user_id, ('streak',), streak or 0, generation)
         except SQLAlchemyError as e:
-            logger.error(f"Streak getirme hatası: {e}")
+            logger.error("Streak getirme hatası: %s", e)
             return 0
-        finally:
-            session.close()
 
     def get_total_quizzes(self, user_id: int) -> int:
         """
@@ -958,14 +1764,17 @@ class DatabaseManager:
         Returns:
             Toplam quiz sayısı
         """
-        session = self.get_session()
+        cached = self._get_cached_stat(user_id, ('total_quizzes',))
+        if cached is not _CACHE_MISS:
+            return cached
+        generation = self._stats_generation
         try:
-            return session.query(Quiz).filter_by(user_id=user_id).count()
+            with self._session() as session:
+                total = session.scalar(_QUIZ_COUNT, {'user_id': user_id})
+            return self._cache_stat(user_id, ('total_quizzes',), total, generation)
         except SQLAlchemyError as e:
-            logger.error(f"Toplam quiz sayısı getirme hatası: {e}")
+            logger.error("Toplam quiz sayısı getirme hatası: %s", e)
             return 0
-        finally:
-            session.close()
 
     def get_last_quiz_results(self, user_id: int, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -978,27 +1787,143 @@ class DatabaseManager:
         Returns:
             Quiz sonuç listesi (dict)
         """
-        session = self.get_session()
         try:
-            quizzes = (
-                session.query(Quiz, Topic)
-                .join(Topic, Quiz.topic_id == Topic.id)
-                .filter(Quiz.user_id == user_id)
-                .order_by(Quiz.completed_at.desc())
-                .limit(limit)
-                .all()
-            )
-            return [
-                {
-                    'score': q.score,
-                    'total_questions': q.total_questions,
-                    'completed_at': q.completed_at,
-                    'topic_title': t.title,
-                }
-                for q, t in quizzes
-            ]
+            with self._session() as session:
+                rows = session.execute(_LAST_QUIZ_RESULTS, {'user_id': user_id, 'limit': limit})
+                return [row._asdict() for row in rows]
         except SQLAlchemyError as e:
-            logger.error(f"Son quiz sonuçları getirme hatası: {e}")
+            logger.error("Son quiz sonuçları getirme hatası: %s", e)
             return []
-        finally:
-            session.close()
+
+    # ============ AI ANLATIM ÖNBELLEĞİ ============
+
+    def get_explanation(self, course_key: str, topic_key: str, level: str,
+                        max_age: float) -> Optional[Dict[str, Any]]:
+        """
+        Kaydedilmiş konu anlatımını getir
+
+        Args:
+            course_key: Normalize edilmiş ders adı
+            topic_key: Normalize edilmiş konu adı
+            level: Anlatım seviyesi
+            max_age: Saniye; bundan eski kayıtlar yok sayılır
+
+        Returns:
+            Anlatım sözlüğü veya None
+        """
+        try:
+            with self._session() as session:
+                payload = session.scalar(
+                    select(Explanation.payload).where(
+                        Explanation.course_key == course_key,
+                        Explanation.topic_key == topic_key,
+                        Explanation.level == level,
+                        Explanation.created_at >= utcnow() - timedelta(seconds=max_age),
+                    )
+                )
+            return json.loads(payload) if payload is not None else None
+        except (SQLAlchemyError, ValueError) as e:
+            logger.error("Anlatım getirme hatası: %s", e)
+            return None
+
+    def save_explanation(self, course_key: str, topic_key: str, level: str,
+                         explanation: Dict[str, Any]) -> bool:
+        """
+        Konu anlatımını kaydet (varsa üzerine yazılır)
+
+        Args:
+            course_key: Normalize edilmiş ders adı
+            topic_key: Normalize edilmiş konu adı
+            level: Anlatım seviyesi
+            explanation: explain_topic sonucu
+
+        Returns:
+            Başarılı ise True
+        """
+        values = {
+            'course_key': course_key,
+            'topic_key': topic_key,
+            'level': level,
+            'payload': json.dumps(explanation, ensure_ascii=False),
+            'created_at': utcnow(),
+        }
+        try:
+            with self._session(commit=True) as session:
+                upsert = _UPSERT_INSERTS.get(self.engine.dialect.name)
+                if upsert is None:
+                    session.merge(Explanation(**values))
+                else:
+                    stmt = upsert(Explanation).values(**values)
+                    session.execute(stmt.on_conflict_do_update(
+                        index_elements=[Explanation.course_key, Explanation.topic_key, Explanation.level],
+                        set_={'payload': stmt.excluded.payload, 'created_at': stmt.excluded.created_at},
+                    ))
+            return True
+        except SQLAlchemyError as e:
+            logger.error("Anlatım kaydetme hatası: %s", e)
+            return False
+
+
+@functools.lru_cache(maxsize=1)
+def get_db_manager() -> DatabaseManager:
+    """Süreç genelinde paylaşılan DatabaseManager örneğini döndür"""
+    return DatabaseManager()
+
+
+def init_db() -> DatabaseManager:
+    """
+    Şemayı oluştur ve paylaşılan veritabanı yöneticisini döndür
+    
+    Tablo varlık kontrolleri her örneklemede değil, uygulama açılışında
+    yalnızca bir kez yapılır.
+    
+    Returns:
+        Paylaşılan DatabaseManager örneği
+    """
+    db_manager = get_db_manager()
+    db_manager.create_tables()
+    return db_manager
+
+
+class AsyncDatabaseManager:
+    """
+    DatabaseManager için async cephe
+
+    Her metod çağrısı senkron karşılığını thread havuzunda çalıştırır; böylece
+    Telegram event loop'u veritabanı G/Ç'si sırasında bloklanmaz. Senkron API
+    zamanlayıcı thread'i ve yönetici sınıfları için olduğu gibi kalır.
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        """
+        Args:
+            db_manager: Sarmalanacak senkron veritabanı yöneticisi
+        """
+        self._db_manager = db_manager
+
+    async def get_or_create_user(self, telegram_id: int, username: str = None,
+                                 first_name: str = None, last_name: str = None) -> User:
+        """
+        Kullanıcıyı getir veya oluştur; neredeyse her komutta çağrılır
+
+        Önbellekte geçerli kayıt varsa thread havuzuna gidilmeden döner.
+        """
+        user = self._db_manager._cached_user(telegram_id, username, first_name, last_name)
+        if user is not None:
+            return user
+        return await asyncio.to_thread(
+            self._db_manager.get_or_create_user, telegram_id, username, first_name, last_name
+        )
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self._db_manager, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        # Sonraki çağrılar __getattr__'a düşmesin
+        setattr(self, name, wrapper)
+        return wrapper
@@ -1,14 +1,33 @@
 """
 SQLAlchemy Veritabanı Modelleri
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, Date, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, Date, ForeignKey, Index, CheckConstraint, func, literal_column
+from sqlalchemy.orm import declarative_base
 import enum
 
 Base = declarative_base()
 
 
+def utcnow() -> datetime:
+    """Şu anki UTC zamanı (sütunlar saat dilimsiz olduğu için naive)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def note_search_vector(content, category):
+    """
+    Not araması için PostgreSQL tsvector ifadesi
+    
+    Sorgu, GIN index'inin kullanılabilmesi için index'tekiyle birebir aynı
+    ifadeyi üretmelidir; bu yüzden sabitler bind parametresi değil literal.
+    """
+    empty = literal_column("''")
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(content, empty).concat(literal_column("' '")).concat(func.coalesce(category, empty))
+    )
+
+
 class PriorityLevel(enum.Enum):
     """Öncelik seviyeleri"""
     LOW = "düşük"
@@ -25,8 +44,8 @@ class User(Base):
     username = Column(String(100))
     first_name = Column(String(100))
     last_name = Column(String(100))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_active = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    last_active = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     def __repr__(self):
         return f"<User(id={self.id}, telegram_id={self.telegram_id}, username={self.username})>"
@@ -40,8 +59,16 @@ class Note(Base):
     user_id = Column(Integer, nullable=False, index=True)
     category = Column(String(50), nullable=False, index=True)  # Matematik, Fizik, vb.
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    
+    __table_args__ = (
+        Index('ix_notes_user_created', 'user_id', 'created_at'),
+        Index('ix_notes_user_category', 'user_id', 'category'),
+        Index(
+            'ix_notes_search', note_search_vector(content, category), postgresql_using='gin'
+        ).ddl_if(dialect='postgresql'),
+    )
     
     def __repr__(self):
         return f"<Note(id={self.id}, user_id={self.user_id}, category={self.category})>"
@@ -50,6 +77,9 @@ class Note(Base):
 class Task(Base):
     """Görev/Ajanda modeli"""
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_user_done_due', 'user_id', 'is_completed', 'due_date'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)
@@ -59,8 +89,8 @@ class Task(Base):
     due_date = Column(DateTime)
     is_completed = Column(Boolean, default=False)
     completed_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     def __repr__(self):
         return f"<Task(id={self.id}, user_id={self.user_id}, title={self.title}, priority={self.priority})>"
@@ -69,6 +99,9 @@ class Task(Base):
 class Reminder(Base):
     """Hatırlatıcı modeli"""
     __tablename__ = 'reminders'
+    __table_args__ = (
+        Index('ix_reminders_pending', 'is_sent', 'remind_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)
@@ -77,7 +110,7 @@ class Reminder(Base):
     is_recurring = Column(Boolean, default=False)
     recurrence_pattern = Column(String(50))  # daily, weekly, monthly
     is_sent = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
     
     def __repr__(self):
         return f"<Reminder(id={self.id}, user_id={self.user_id}, remind_at={self.remind_at})>"
@@ -86,12 +119,16 @@ class Reminder(Base):
 class ChatHistory(Base):
     """Sohbet geçmişi modeli (AI context için)"""
     __tablename__ = 'chat_history'
+    __table_args__ = (
+        Index('ix_chat_user_created', 'user_id', 'created_at'),
+        CheckConstraint("role IN ('user', 'assistant', 'model')", name='ck_chat_history_role'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)
-    role = Column(String(20), nullable=False)  # 'user' veya 'assistant'
+    role = Column(String(20), nullable=False)  # 'user', 'model' (eski kayıtlarda 'assistant')
     message = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=utcnow, index=True)
     
     def __repr__(self):
         return f"<ChatHistory(id={self.id}, user_id={self.user_id}, role={self.role})>"
@@ -107,7 +144,11 @@ class Course(Base):
     description = Column(Text)
     total_topics = Column(Integer, default=10)
     completed_topics = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+
+    __table_args__ = (
+        Index('ix_courses_user_lower_name', user_id, func.lower(name)),
+    )
 
     def __repr__(self):
         return f"<Course(id={self.id}, user_id={self.user_id}, name={self.name})>"
@@ -125,6 +166,11 @@ class Topic(Base):
     is_completed = Column(Boolean, default=False)
     completed_at = Column(DateTime)
 
+    __table_args__ = (
+        Index('ix_topics_course_done_week', 'course_id', 'is_completed', 'week_number'),
+        Index('ix_topics_course_lower_title', course_id, func.lower(title)),
+    )
+
     def __repr__(self):
         return f"<Topic(id={self.id}, course_id={self.course_id}, title={self.title})>"
 
@@ -132,13 +178,17 @@ class Topic(Base):
 class Quiz(Base):
     """Quiz modeli"""
     __tablename__ = 'quizzes'
+    __table_args__ = (
+        Index('ix_quizzes_user_topic', 'user_id', 'topic_id'),
+        Index('ix_quizzes_user_completed', 'user_id', 'completed_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)
     topic_id = Column(Integer, ForeignKey('topics.id'), nullable=False)
     score = Column(Integer)
     total_questions = Column(Integer)
-    completed_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, default=utcnow)
 
     def __repr__(self):
         return f"<Quiz(id={self.id}, user_id={self.user_id}, score={self.score}/{self.total_questions})>"
@@ -147,6 +197,9 @@ class Quiz(Base):
 class StudyProgress(Base):
     """Çalışma ilerleme modeli"""
     __tablename__ = 'study_progress'
+    __table_args__ = (
+        Index('ux_study_progress_user_course', 'user_id', 'course_id', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)
@@ -157,3 +210,18 @@ class StudyProgress(Base):
 
     def __repr__(self):
         return f"<StudyProgress(id={self.id}, user_id={self.user_id}, course_id={self.course_id})>"
+
+
+class Explanation(Base):
+    """AI konu anlatımı önbelleği (yeniden başlatmalarda da korunur)"""
+    __tablename__ = 'explanations'
+
+    # Normalize edilmiş ders/konu adı ve anlatım seviyesi
+    course_key = Column(String(200), primary_key=True)
+    topic_key = Column(String(200), primary_key=True)
+    level = Column(String(20), primary_key=True)
+    payload = Column(Text, nullable=False)  # explain_topic sonucu (JSON)
+    created_at = Column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Explanation(course={self.course_key}, topic={self.topic_key}, level={self.level})>"
@@ -5,11 +5,10 @@ Telegram bot ve hatırlatıcı sistemi ile çalışan AI destekli kişisel asist
 import logging
 import signal
 import sys
-import asyncio
 from pathlib import Path
 
-from config import check_config, logger, REPLICATE_API_TOKEN
-from database import DatabaseManager
+from config import check_config, logger, REPLICATE_API_TOKEN, TEMP_IMAGE_CLEANUP_INTERVAL, CHAT_CLEANUP_INTERVAL
+from database import init_db
 from modules.ai_assistant import AIAssistant
 from modules.ai_teacher import AITeacher
 from modules.notes_manager import NotesManager
@@ -54,50 +53,50 @@ def initialize_database():
     global db_manager
     
     try:
-        db_manager = DatabaseManager()
+        db_manager = init_db()
         logger.info("Veritabanı başarıyla başlatıldı")
         return db_manager
     except Exception as e:
-        logger.error(f"Veritabanı başlatma hatası: {e}")
+        logger.error("Veritabanı başlatma hatası: %s", e)
         raise
 
 
 def check_reminders():
-    """Bekleyen hatırlatıcıları kontrol et ve gönder"""
+    """
+    Bekleyen hatırlatıcıları kontrol et ve gönder
+    
+    Zamanlayıcının thread'inde çalışır; gönderimler bot'un event loop'una aktarılır.
+    """
     global db_manager, telegram_bot
     
-    if not db_manager or not telegram_bot:
+    # Bot'un loop'u henüz çalışmıyorsa hatırlatıcılar sahiplenilmez, sonraki kontrole kalır
+    if not db_manager or not telegram_bot or telegram_bot.loop is None:
         return
     
     try:
-        # Bekleyen hatırlatıcıları al
-        reminders = db_manager.get_pending_reminders()
+        # Zamanı gelen hatırlatıcıları alıcının Telegram ID'siyle birlikte tek sorguda
+        # sahiplen (gönderildi olarak işaretlenir)
+        reminders = db_manager.claim_pending_reminders()
         
         for reminder in reminders:
-            # Telegram kullanıcı ID'sini al
-            session = db_manager.get_session()
-            try:
-                from database.models import User
-                user = session.query(User).filter_by(id=reminder.user_id).first()
-                
-                if user:
-                    # Hatırlatıcı gönder
-                    asyncio.create_task(
-                        telegram_bot.send_reminder_notification(
-                            user.telegram_id,
-                            reminder.message
-                        )
-                    )
-                    
-                    # Hatırlatıcıyı gönderildi olarak işaretle
-                    db_manager.mark_reminder_sent(reminder.id)
-                    
-                    logger.info(f"Hatırlatıcı gönderildi: ID={reminder.id}, kullanıcı={user.telegram_id}")
-            finally:
-                session.close()
+            # Hatırlatıcı gönder; başarısız olursa tekrar bekleyen duruma alınır
+            future = telegram_bot.submit(
+                deliver_reminder(reminder.id, reminder.telegram_id, reminder.message)
+            )
+            if future is None:
+                # Bot bu arada durduruldu
+                db_manager.release_reminder(reminder.id)
                 
     except Exception as e:
-        logger.error(f"Hatırlatıcı kontrolü hatası: {e}")
+        logger.error("Hatırlatıcı kontrolü hatası: %s", e)
+
+
+async def deliver_reminder(reminder_id: int, telegram_id: int, message: str):
+    """Hatırlatıcıyı gönder, gönderilemezse bir sonraki kontrole bırak"""
+    if await telegram_bot.send_reminder_notification(telegram_id, message):
+        logger.info("Hatırlatıcı gönderildi: ID=%s, kullanıcı=%s", reminder_id, telegram_id)
+    else:
+        await db_manager.aio.release_reminder(reminder_id)
 
 
 def initialize_components():
@@ -117,7 +116,7 @@ def initialize_components():
     # AI Öğretmen'i başlat (mevcut Gemini modelini kullan)
     ai_teacher = None
     if ai_assistant.is_available():
-        ai_teacher = AITeacher(ai_assistant.model)
+        ai_teacher = AITeacher(ai_assistant.model, db_manager)
         logger.info("✅ AI Öğretmen başlatıldı")
     else:
         logger.warning("⚠️ AI Öğretmen başlatılamadı (AI asistan kullanılamıyor)")
@@ -142,6 +141,25 @@ def initialize_components():
     reminder_scheduler = ReminderScheduler(reminder_callback=check_reminders)
     reminder_scheduler.start()
     
+    # Eski sohbet mesajlarını zamanlayıcı thread'inde toplu olarak temizle
+    reminder_scheduler.scheduler.add_job(
+        db_manager.cleanup_chat_history,
+        'interval',
+        seconds=CHAT_CLEANUP_INTERVAL,
+        id='chat_history_cleanup',
+        replace_existing=True
+    )
+    
+    # Eski geçici görüntüleri zamanlayıcı thread'inde periyodik olarak temizle
+    if telegram_bot.image_handler:
+        reminder_scheduler.scheduler.add_job(
+            telegram_bot.image_handler.cleanup_old_files,
+            'interval',
+            seconds=TEMP_IMAGE_CLEANUP_INTERVAL,
+            id='temp_image_cleanup',
+            replace_existing=True
+        )
+    
     # WhatsApp bot (placeholder)
     whatsapp_bot = WhatsAppBot()
     
@@ -150,7 +168,7 @@ def initialize_components():
 
 def signal_handler(sig, frame):
     """Graceful shutdown için signal handler"""
-    logger.info(f"Signal alındı: {sig}")
+    logger.info("Signal alındı: %s", sig)
     logger.info("Uygulama kapatılıyor...")
     
     # Hatırlatıcı zamanlayıcısını durdur
@@ -214,7 +232,7 @@ def main():
         logger.info("Kullanıcı tarafından durduruldu")
         signal_handler(signal.SIGINT, None)
     except Exception as e:
-        logger.error(f"Kritik hata: {e}", exc_info=True)
+        logger.error("Kritik hata: %s", e, exc_info=True)
         sys.exit(1)
 
 
@@ -1,15 +1,26 @@
 """
 Google Gemini Pro AI Asistan Entegrasyonu
 """
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import Deque, List, Dict, Any, Optional, Set
 import google.generativeai as genai
 
-from config import GEMINI_API_KEY, GEMINI_MODEL, GEMINI_TEMPERATURE, GEMINI_MAX_TOKENS, CONTEXT_WINDOW
+from config import (
+    GEMINI_API_KEY, GEMINI_MODEL, GEMINI_TEMPERATURE, GEMINI_MAX_TOKENS,
+    CONTEXT_WINDOW, CHAT_HISTORY_CACHE_SIZE,
+)
 from database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+_DETAIL_INSTRUCTIONS = {
+    "basit": "Basit ve anlaşılır bir dille, örneklerle açıkla.",
+    "orta": "Orta seviyede detayla, örnekler ve açıklamalarla sun.",
+    "detaylı": "Detaylı ve kapsamlı bir şekilde, örnekler ve uygulamalarla açıkla."
+}
+
 
 class AIAssistant:
     """Google Gemini Pro AI Asistan Sınıfı"""
@@ -24,6 +35,10 @@ class AIAssistant:
         self.db_manager = db_manager
         self.model = None
         self.model_name = None
+        # Yanıt döndükten sonra arka planda süren sohbet kayıtları (GC'ye karşı referans)
+        self._pending_writes: Set[asyncio.Task] = set()
+        # user_id -> son CONTEXT_WINDOW mesaj (Gemini formatında); ilk mesajda veritabanından doldurulur
+        self._history_cache: Dict[int, Deque[Dict[str, Any]]] = {}
         
         if not GEMINI_API_KEY:
             logger.error("GEMINI_API_KEY bulunamadı!")
@@ -61,37 +76,37 @@ Her zaman yapıcı, teşvik edici ve eğitici ol."""
                 'max_output_tokens': GEMINI_MAX_TOKENS,
             }
             
-            # İlk çalışan modeli kullan
-            model_found = False
-            for model_name in models_to_try:
-                try:
-                    test_model = genai.GenerativeModel(
-                        model_name=model_name,
-                        generation_config=generation_config,
-                        system_instruction=system_instruction
-                    )
-                    # Modeli test et
-                    test_model.count_tokens("test")
-                    self.model = test_model
-                    self.model_name = model_name
-                    logger.info(f"✅ Gemini AI modeli başlatıldı: {model_name}")
-                    model_found = True
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ {model_name} kullanılamıyor ({str(e)}), sonraki deneniyor...")
-                    continue
+            # Her adayı ayrı istekle denemek yerine erişilebilir modelleri tek çağrıda al
+            try:
+                available = {m.name.split('/')[-1] for m in genai.list_models()}
+            except Exception as e:
+                logger.warning("⚠️ Model listesi alınamadı (%s), ilk aday kullanılacak", e)
+                available = None
             
-            if not model_found:
+            model_name = next(
+                (name for name in models_to_try if available is None or name in available),
+                None
+            )
+            if model_name is None:
                 raise Exception("❌ Hiçbir Gemini model bulunamadı! API key'inizi kontrol edin.")
+            
+            # GenerativeModel oluşturmak ağ isteği yapmaz
+            self.model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config,
+                system_instruction=system_instruction
+            )
+            self.model_name = model_name
+            logger.info("✅ Gemini AI modeli başlatıldı: %s", model_name)
                 
         except Exception as e:
-            logger.error(f"Gemini AI başlatma hatası: {e}")
+            logger.error("Gemini AI başlatma hatası: %s", e)
     
     def is_available(self) -> bool:
         """AI asistan kullanılabilir mi?"""
         return self.model is not None
     
-    def chat(self, user_id: int, message: str, use_context: bool = True) -> str:
+    async def chat(self, user_id: int, message: str, use_context: bool = True) -> str:
         """
         Kullanıcı ile sohbet et
         
@@ -107,33 +122,64 @@ Her zaman yapıcı, teşvik edici ve eğitici ol."""
             return "Üzgünüm, AI asistan şu anda kullanılamıyor. Lütfen GEMINI_API_KEY ayarlandığından emin olun."
         
         try:
-            # Kullanıcı mesajını kaydet
-            self.db_manager.add_chat_message(user_id, 'user', message)
-            
-            # Sohbet geçmişini al
-            if use_context:
-                history = self.db_manager.get_chat_history(user_id, limit=CONTEXT_WINDOW)
-            else:
-                history = []
-            
-            # Sohbet oturumu başlat (system_instruction modelde tanımlı)
-            chat_session = self.model.start_chat(history=history)
+            # Sohbet geçmişini al (yeni mesaj sona eklenir)
+            history = list(await self._get_history(user_id)) if use_context else []
             
-            # Yanıt oluştur
-            response = chat_session.send_message(message)
+            # Durumsuz istek: geçmiş her seferinde içerik olarak gönderilir,
+            # beklerken event loop diğer kullanıcılara hizmet eder
+            response = await self.model.generate_content_async(
+                [*history, {'role': 'user', 'parts': [{'text': message}]}]
+            )
             ai_response = response.text
             
-            # AI yanıtını kaydet (Gemini'de 'model' rolü kullanılır)
-            self.db_manager.add_chat_message(user_id, 'model', ai_response)
+            # Bellekteki geçmiş hemen güncellenir; sonraki mesaj kaydın bitmesini beklemez
+            cached = self._history_cache.get(user_id)
+            if cached is not None:
+                cached.extend((
+                    {'role': 'user', 'parts': [{'text': message}]},
+                    {'role': 'model', 'parts': [{'text': ai_response}]},
+                ))
+            
+            # Kullanıcı mesajını ve AI yanıtını tek seferde, yanıtı bekletmeden kaydet
+            # (Gemini'de 'model' rolü kullanılır)
+            self._save_chat_turn(user_id, message, ai_response)
             
-            logger.info(f"AI yanıt oluşturuldu: kullanıcı={user_id}")
+            logger.debug("AI yanıt oluşturuldu: kullanıcı=%s", user_id)
             return ai_response
             
         except Exception as e:
-            logger.error(f"AI sohbet hatası: {e}")
+            logger.error("AI sohbet hatası: %s", e)
             return f"Üzgünüm, bir hata oluştu: {str(e)}"
     
-    def simple_chat(self, message: str, context: str = None) -> str:
+    async def _get_history(self, user_id: int) -> Deque[Dict[str, Any]]:
+        """Kullanıcının son mesajlarını bellekten, yoksa veritabanından getir"""
+        history = self._history_cache.get(user_id)
+        if history is None:
+            rows = await self.db_manager.aio.get_chat_history(user_id, limit=CONTEXT_WINDOW)
+            if rows is None:
+                # Okuma başarısız: bu tur geçmişsiz gider, sonraki mesajda yeniden denenir
+                return deque(maxlen=CONTEXT_WINDOW)
+            history = deque(rows, maxlen=CONTEXT_WINDOW)
+            self._history_cache[user_id] = history
+            if len(self._history_cache) > CHAT_HISTORY_CACHE_SIZE:
+                self._history_cache.pop(next(iter(self._history_cache)), None)
+        return history
+    
+    def _save_chat_turn(self, user_id: int, message: str, ai_response: str):
+        """Sohbet turunu arka planda veritabanına yaz"""
+        task = asyncio.create_task(
+            self.db_manager.aio.add_chat_messages(user_id, [('user', message), ('model', ai_response)])
+        )
+        self._pending_writes.add(task)
+        task.add_done_callback(self._on_chat_saved)
+    
+    def _on_chat_saved(self, task: asyncio.Task):
+        """Arka plan kaydı bitince referansı bırak, hata varsa logla"""
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Sohbet kaydetme hatası: %s", task.exception())
+    
+    async def simple_chat(self, message: str, context: str = None) -> str:
         """
         Basit sohbet (kullanıcı ID'si olmadan)
         Geçmiş kaydedilmez, sadece tek seferlik yanıt üretilir
@@ -156,14 +202,14 @@ Her zaman yapıcı, teşvik edici ve eğitici ol."""
                 full_message = message
             
             # Yanıt oluştur (geçmiş olmadan)
-            response = self.model.generate_content(full_message)
+            response = await self.model.generate_content_async(full_message)
             return response.text
             
         except Exception as e:
-            logger.error(f"Basit sohbet hatası: {e}")
+            logger.error("Basit sohbet hatası: %s", e)
             return "Üzgünüm, şu anda yanıt veremiyorum. Lütfen daha sonra tekrar deneyin."
     
-    def summarize_notes(self, notes_content: str) -> str:
+    async def summarize_notes(self, notes_content: str) -> str:
         """
         Notları özetle
         
@@ -183,14 +229,14 @@ Her zaman yapıcı, teşvik edici ve eğitici ol."""
 
 Özet:"""
             
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             return response.text
             
         except Exception as e:
-            logger.error(f"Not özetleme hatası: {e}")
+            logger.error("Not özetleme hatası: %s", e)
             return f"Not özetleme hatası: {str(e)}"
     
-    def explain_topic(self, topic: str, detail_level: str = "orta") -> str:
+    async def explain_topic(self, topic: str, detail_level: str = "orta") -> str:
         """
         Bir konuyu açıkla
         
@@ -205,13 +251,7 @@ Her zaman yapıcı, teşvik edici ve eğitici ol."""
             return "AI asistan kullanılamıyor."
         
         try:
-            detail_instructions = {
-                "basit": "Basit ve anlaşılır bir dille, örneklerle açıkla.",
-                "orta": "Orta seviyede detayla, örnekler ve açıklamalarla sun.",
-                "detaylı": "Detaylı ve kapsamlı bir şekilde, örnekler ve uygulamalarla açıkla."
-            }
-            
-            instruction = detail_instructions.get(detail_level, detail_instructions["orta"])
+            instruction = _DETAIL_INSTRUCTIONS.get(detail_level, _DETAIL_INSTRUCTIONS["orta"])
             
             prompt = f"""Aşağıdaki konuyu Türkçe olarak açıkla:
 
@@ -221,14 +261,14 @@ Açıklama seviyesi: {instruction}
 
 Açıklama:"""
             
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             return response.text
             
         except Exception as e:
-            logger.error(f"Konu açıklama hatası: {e}")
+            logger.error("Konu açıklama hatası: %s", e)
             return f"Konu açıklama hatası: {str(e)}"
     
-    def answer_question(self, question: str, context: str = None) -> str:
+    async def answer_question(self, question: str, context: str = None) -> str:
         """
         Soru yanıtla
         
@@ -256,14 +296,14 @@ Lütfen soruyu detaylı ve anlaşılır bir şekilde Türkçe yanıtla.
 
 Yanıt:"""
             
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             return response.text
             
         except Exception as e:
-            logger.error(f"Soru yanıtlama hatası: {e}")
+            logger.error("Soru yanıtlama hatası: %s", e)
             return f"Soru yanıtlama hatası: {str(e)}"
     
-    def generate_study_plan(self, subject: str, duration_days: int = 7) -> str:
+    async def generate_study_plan(self, subject: str, duration_days: int = 7) -> str:
         """
         Çalışma planı oluştur
         
@@ -288,9 +328,9 @@ Plan:
 
 Çalışma Planı:"""
             
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             return response.text
             
         except Exception as e:
-            logger.error(f"Çalışma planı oluşturma hatası: {e}")
+            logger.error("Çalışma planı oluşturma hatası: %s", e)
             return f"Çalışma planı oluşturma hatası: {str(e)}"
@@ -2,32 +2,173 @@
 AI Öğretmen Modülü
 Gemini AI ile konu anlatımı ve quiz üretimi
 """
+import asyncio
 import json
 import logging
 import re
-from typing import Dict, Any, List
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from config import EXPLAIN_CACHE_TTL, QUIZ_CACHE_TTL, AI_TEACHER_CACHE_SIZE, AI_MAX_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
+# orjson varsa quiz yanıtları onunla ayrıştırılır; orjson.JSONDecodeError,
+# json.JSONDecodeError'ın alt sınıfı olduğundan hata yakalama aynı kalır
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Önbellek anahtarı için: Türkçe/İngilizce büyük-küçük I farkı ve noktalama yok sayılır
+# (C++ ile C# ayrı kalsın diye + ve # korunur)
+_KEY_CHAR_MAP = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i', '_': ' '})
+_KEY_NOISE_RE = re.compile(r'[^\w\s+#]+')
+
+# Sabit yönergeler istemin başında, değişken alanlar sonunda: her istekte aynı
+# önek gönderildiği için sağlayıcının önek önbelleği bu kısmı yeniden kullanabilir
+EXPLAIN_PROMPT_PREFIX = """Sen bir üniversite öğretmenisin. Türkçe olarak açıkla.
+
+Aşağıda verilen dersin konusunu, belirtilen seviyeye uygun şekilde şu formatta açıkla:
+
+## KONU ANLATIMI
+[Detaylı, anlaşılır açıklama. Örneklerle anlat.]
+
+## KOD ÖRNEĞİ
+[Python/JavaScript/C++ kod örneği. Yorumlu ve çalışır kod. Kod yoksa "Kod örneği yok." yaz.]
+
+## ÖNEMLİ NOKTALAR
+- [Nokta 1]
+- [Nokta 2]
+- [Nokta 3]
+
+## PRATİK İPUCU
+[Gerçek hayat uygulaması veya hatırlatma]
+
+"""
+
+QUIZ_PROMPT_PREFIX = """Aşağıda verilen dersin konusu için istenen sayıda çoktan seçmeli soru oluştur.
+
+Sadece JSON formatında döndür, başka hiçbir şey yazma:
+[
+  {
+    "question": "Soru metni",
+    "options": ["A) Şık 1", "B) Şık 2", "C) Şık 3", "D) Şık 4"],
+    "correct": "A",
+    "explanation": "Neden A doğru?"
+  }
+]
+
+"""
+
+QUIZ_BATCH_PROMPT_PREFIX = """Aşağıda numaralandırılmış her ders/konu çifti için istenen sayıda çoktan seçmeli soru oluştur.
+
+Sadece JSON formatında döndür, başka hiçbir şey yazma. Dış dizinin i. elemanı,
+i. çiftin sorularını içeren bir dizi olsun:
+[
+  [
+    {
+      "question": "Soru metni",
+      "options": ["A) Şık 1", "B) Şık 2", "C) Şık 3", "D) Şık 4"],
+      "correct": "A",
+      "explanation": "Neden A doğru?"
+    }
+  ]
+]
+
+"""
+
+# Tek istemde istenecek en fazla konu; daha büyük gruplarda yanıt süresi ve
+# hatalı JSON riski, kazanılan istek sayısından hızlı artar
+QUIZ_BATCH_SIZE = 5
+
+_LEVEL_NAMES = {
+    "beginner": "başlangıç",
+    "intermediate": "orta",
+    "advanced": "ileri",
+}
+
+# Yanıt ayrıştırmada kullanılan desenler modül yüklenirken bir kez derlenir
+_HEADER_SPLIT_RE = re.compile(r'^##\s*', re.MULTILINE)
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# Başlıklar büyük harfe çevrilip karşılaştırılır; Türkçe i/İ/ı farkı yok sayılır
+_HEADER_CHAR_MAP = str.maketrans({'i': 'I', 'İ': 'I', 'ı': 'I'})
+_SECTION_HEADERS = tuple(
+    (header.translate(_HEADER_CHAR_MAP), key)
+    for header, key in (
+        ("KONU ANLATIMI", "explanation"),
+        ("KOD ÖRNEĞİ", "code_example"),
+        ("ÖNEMLİ NOKTALAR", "key_points_raw"),
+        ("PRATİK İPUCU", "practical_tip"),
+    )
+)
+
+
+def _normalize_key(text: str) -> str:
+    """Aynı isteğin farklı yazımlarını ("Gradient Descent?" / "gradient  descent") eşle"""
+    text = _KEY_NOISE_RE.sub(' ', text.translate(_KEY_CHAR_MAP).lower())
+    return ' '.join(text.split())
+
 
 class AITeacher:
     """
     Gemini AI ile konu anlatımı yapan öğretmen
     """
 
-    def __init__(self, model):
+    def __init__(self, model, db_manager=None):
         """
         AI Öğretmen'i başlat
 
         Args:
             model: Gemini GenerativeModel nesnesi
+            db_manager: Veritabanı yöneticisi (opsiyonel); verilirse konu
+                        anlatımları yeniden başlatmalarda da korunur
         """
         self.model = model
+        self.db_manager = db_manager
+        # (istek türü, ders, konu, seviye/soru sayısı) -> (yanıt, önbelleğe alınma zamanı)
+        self._cache: Dict[Tuple, Tuple[Any, float]] = {}
+        # Eşzamanlı Gemini isteği sınırı; çalışan event loop'ta ilk kullanımda oluşturulur
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Önbellek anahtarı -> o anahtar için sürmekte olan Gemini isteği
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
 
     def is_available(self) -> bool:
         """AI öğretmen kullanılabilir mi?"""
         return self.model is not None
 
+    def _get_cached(self, key: Tuple, ttl: float) -> Optional[Any]:
+        """Süresi dolmamış yanıtı döndür, yoksa None"""
+        entry = self._cache.get(key)
+        if entry is None or time.monotonic() - entry[1] >= ttl:
+            return None
+        return entry[0]
+
+    def _cache_response(self, key: Tuple, value: Any):
+        """Yanıtı önbelleğe al (en eski kayıt sınırı aşınca atılır)"""
+        self._cache.pop(key, None)
+        self._cache[key] = (value, time.monotonic())
+        if len(self._cache) > AI_TEACHER_CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)), None)
+
+    async def _singleflight(self, key: Tuple, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Aynı anahtar için eşzamanlı istekleri tek Gemini çağrısında birleştir
+
+        İlk çağıran isteği bir Task olarak başlatır; istek sürerken gelenler
+        aynı Task'ı bekler. Task shield ile beklendiği için bir çağıranın
+        iptal edilmesi diğerlerinin sonucunu etkilemez.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
     async def explain_topic(self, course: str, topic: str, level: str = "beginner") -> Dict[str, Any]:
         """
         Konu anlatımı yap
@@ -45,41 +186,36 @@ class AITeacher:
                 "practical_tip": "Pratik ipucu"
             }
         """
-        seviye_map = {
-            "beginner": "başlangıç",
-            "intermediate": "orta",
-            "advanced": "ileri",
-        }
-        seviye = seviye_map.get(level, "başlangıç")
-
-        prompt = f"""Sen bir üniversite öğretmenisin. Türkçe olarak açıkla.
-
-Ders: {course}
-Konu: {topic}
-Seviye: {seviye}
-
-Lütfen şu formatta açıkla:
-
-## KONU ANLATIMI
-[Detaylı, anlaşılır açıklama. Örneklerle anlat.]
+        seviye = _LEVEL_NAMES.get(level, "başlangıç")
 
-## KOD ÖRNEĞİ
-[Python/JavaScript/C++ kod örneği. Yorumlu ve çalışır kod. Kod yoksa "Kod örneği yok." yaz.]
-
-## ÖNEMLİ NOKTALAR
-- [Nokta 1]
-- [Nokta 2]
-- [Nokta 3]
+        cache_key = ('explain', _normalize_key(course), _normalize_key(topic), seviye)
+        cached = self._get_cached(cache_key, EXPLAIN_CACHE_TTL)
+        if cached is not None:
+            return cached
 
-## PRATİK İPUCU
-[Gerçek hayat uygulaması veya hatırlatma]
-"""
+        prompt = f"{EXPLAIN_PROMPT_PREFIX}Ders: {course}\nKonu: {topic}\nSeviye: {seviye}\n"
+        return await self._singleflight(cache_key, lambda: self._fetch_explanation(cache_key, prompt))
 
+    async def _fetch_explanation(self, cache_key: Tuple, prompt: str) -> Dict[str, Any]:
+        """Konu anlatımını kalıcı önbellekten ya da Gemini'den al ve önbelleğe yaz"""
+        _, course_key, topic_key, seviye = cache_key
         try:
+            if self.db_manager is not None:
+                stored = await self.db_manager.aio.get_explanation(
+                    course_key, topic_key, seviye, EXPLAIN_CACHE_TTL
+                )
+                if stored is not None:
+                    self._cache_response(cache_key, stored)
+                    return stored
+
             response = await self.model.generate_content_async(prompt)
-            return self._parse_explanation(response.text)
+            result = self._parse_explanation(response.text)
+            self._cache_response(cache_key, result)
+            if self.db_manager is not None:
+                await self.db_manager.aio.save_explanation(course_key, topic_key, seviye, result)
+            return result
         except Exception as e:
-            logger.error(f"Konu anlatımı hatası: {e}")
+            logger.error("Konu anlatımı hatası: %s", e)
             return {
                 "explanation": f"Konu anlatımı sırasında hata oluştu: {e}",
                 "code_example": "",
@@ -87,6 +223,37 @@ Lütfen şu formatta açıkla:
                 "practical_tip": "",
             }
 
+    async def explain_topics_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Birden fazla konuyu paralel olarak anlat
+
+        Args:
+            items: explain_topic argümanları (örn: {"course": ..., "topic": ..., "level": ...})
+
+        Returns:
+            list: Her konu için explain_topic sonucu, items ile aynı sırada
+        """
+        return await asyncio.gather(*(self._bounded(self.explain_topic(**p)) for p in items))
+
+    async def generate_quizzes_many(self, items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Birden fazla konu için quiz sorularını paralel olarak üret
+
+        Args:
+            items: generate_quiz argümanları (örn: {"course": ..., "topic": ..., "num_questions": ...})
+
+        Returns:
+            list: Her konu için generate_quiz sonucu, items ile aynı sırada
+        """
+        return await asyncio.gather(*(self._bounded(self.generate_quiz(**p)) for p in items))
+
+    async def _bounded(self, coro):
+        """Coroutine'i AI_MAX_CONCURRENCY sınırı içinde çalıştır"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+        async with self._semaphore:
+            return await coro
+
     def _parse_explanation(self, text: str) -> Dict[str, Any]:
         """AI yanıtını ayrıştır"""
         result = {
@@ -96,18 +263,17 @@ Lütfen şu formatta açıkla:
             "practical_tip": "",
         }
 
-        # Bölümleri ayıkla
-        sections = {
-            "explanation": r"##\s*KONU ANLATIMI\s*\n(.*?)(?=##|\Z)",
-            "code_example": r"##\s*KOD ÖRNEĞİ\s*\n(.*?)(?=##|\Z)",
-            "key_points_raw": r"##\s*ÖNEMLİ NOKTALAR\s*\n(.*?)(?=##|\Z)",
-            "practical_tip": r"##\s*PRATİK İPUCU\s*\n(.*?)(?=##|\Z)",
-        }
-
-        for key, pattern in sections.items():
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match:
-                result[key] = match.group(1).strip()
+        # Metni "##" ile başlayan satırlardan tek geçişte böl; her parçanın ilk
+        # satırı başlık, kalanı içeriktir (ilk başlıktan önceki metin atlanır)
+        for part in _HEADER_SPLIT_RE.split(text)[1:]:
+            header, _, body = part.partition("\n")
+            header = header.strip().translate(_HEADER_CHAR_MAP).upper()
+            for known, key in _SECTION_HEADERS:
+                if header.startswith(known):
+                    # Aynı başlık tekrar ederse ilki kullanılır
+                    if not result.get(key):
+                        result[key] = body.strip()
+                    break
 
         # Önemli noktaları listeye çevir
         raw = result.pop("key_points_raw", "")
@@ -144,37 +310,104 @@ Lütfen şu formatta açıkla:
                 ...
             ]
         """
-        prompt = f"""{course} - {topic} konusu için {num_questions} adet çoktan seçmeli soru oluştur.
+        cache_key = ('quiz', course, topic, num_questions)
+        cached = self._get_cached(cache_key, QUIZ_CACHE_TTL)
+        if cached is not None:
+            return cached
 
-Sadece JSON formatında döndür, başka hiçbir şey yazma:
-[
-  {{
-    "question": "Soru metni",
-    "options": ["A) Şık 1", "B) Şık 2", "C) Şık 3", "D) Şık 4"],
-    "correct": "A",
-    "explanation": "Neden A doğru?"
-  }}
-]
-"""
+        prompt = f"{QUIZ_PROMPT_PREFIX}Ders: {course}\nKonu: {topic}\nSoru sayısı: {num_questions}\n"
+        return await self._singleflight(cache_key, lambda: self._fetch_quiz(cache_key, prompt))
 
+    async def _fetch_quiz(self, cache_key: Tuple, prompt: str) -> List[Dict[str, Any]]:
+        """Quiz sorularını Gemini'den al, doğrula ve önbelleğe yaz"""
         try:
             response = await self.model.generate_content_async(prompt)
-            raw = response.text.strip()
-            # JSON bloğunu ayıkla
-            json_match = re.search(r'\[.*\]', raw, re.DOTALL)
-            if json_match:
-                questions = json.loads(json_match.group(0))
-            else:
-                questions = json.loads(raw)
-            # Doğrulama: her soru gerekli alanlara sahip olmalı
-            validated = []
-            for q in questions:
-                if all(k in q for k in ("question", "options", "correct", "explanation")):
-                    validated.append(q)
+            validated = self._validate_questions(self._extract_json(response.text))
+            # Boş sonuç önbelleğe alınmaz, sonraki denemede yeniden üretilir
+            if validated:
+                self._cache_response(cache_key, validated)
             return validated
         except json.JSONDecodeError as e:
-            logger.error(f"Quiz JSON ayrıştırma hatası: {e}")
+            logger.error("Quiz JSON ayrıştırma hatası: %s", e)
             return []
         except Exception as e:
-            logger.error(f"Quiz üretme hatası: {e}")
+            logger.error("Quiz üretme hatası: %s", e)
+            return []
+
+    async def generate_quiz_batch(self, items: List[Tuple[str, str, int]]) -> List[List[Dict[str, Any]]]:
+        """
+        Birden fazla konu için quiz sorularını az sayıda istekle üret
+
+        Önbellekte olmayan konular QUIZ_BATCH_SIZE'lık gruplar halinde tek
+        istemde istenir; N konu için N yerine ⌈N/QUIZ_BATCH_SIZE⌉ istek yapılır.
+
+        Args:
+            items: (ders, konu, soru sayısı) üçlüleri
+
+        Returns:
+            list: Her üçlü için generate_quiz ile aynı formatta soru listesi
+                  (üretilemeyenler için boş liste), items ile aynı sırada
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in items]
+        pending = []
+        for i, (course, topic, num_questions) in enumerate(items):
+            cached = self._get_cached(('quiz', course, topic, num_questions), QUIZ_CACHE_TTL)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        for start in range(0, len(pending), QUIZ_BATCH_SIZE):
+            group = pending[start:start + QUIZ_BATCH_SIZE]
+            quizzes = await self._generate_quiz_group([items[i] for i in group])
+            for i, questions in zip(group, quizzes):
+                results[i] = questions
+                if questions:
+                    self._cache_response(('quiz', *items[i]), questions)
+        return results
+
+    async def _generate_quiz_group(self, items: List[Tuple[str, str, int]]) -> List[List[Dict[str, Any]]]:
+        """Bir grup konunun sorularını tek istekte üret (internal)"""
+        lines = "".join(
+            f"{n}) Ders: {course} | Konu: {topic} | Soru sayısı: {num_questions}\n"
+            for n, (course, topic, num_questions) in enumerate(items, 1)
+        )
+        try:
+            response = await self.model.generate_content_async(QUIZ_BATCH_PROMPT_PREFIX + lines)
+            groups = self._extract_json(response.text)
+        except json.JSONDecodeError as e:
+            logger.error("Toplu quiz JSON ayrıştırma hatası: %s", e)
+            groups = []
+        except Exception as e:
+            logger.error("Toplu quiz üretme hatası: %s", e)
+            groups = []
+        if not isinstance(groups, list):
+            groups = []
+        # Eksik gelen gruplar boş liste olur
+        return [
+            self._validate_questions(groups[i]) if i < len(groups) else []
+            for i in range(len(items))
+        ]
+
+    @staticmethod
+    def _extract_json(text: str) -> Any:
+        """Yanıttaki JSON dizisini ayıkla (kod bloğu veya açıklama metni olsa da)"""
+        raw = text.strip()
+        # Yanıt istendiği gibi yalnızca JSON ise regex taramasına gerek yok
+        if raw.startswith('[') and raw.endswith(']'):
+            try:
+                return _json_loads(raw)
+            except json.JSONDecodeError:
+                pass
+        json_match = _JSON_ARRAY_RE.search(raw)
+        return _json_loads(json_match.group(0) if json_match else raw)
+
+    @staticmethod
+    def _validate_questions(questions: Any) -> List[Dict[str, Any]]:
+        """Yalnızca gerekli alanların hepsine sahip soruları bırak"""
+        if not isinstance(questions, list):
             return []
+        return [
+            q for q in questions
+            if isinstance(q, dict) and all(k in q for k in ("question", "options", "correct", "explanation"))
+        ]
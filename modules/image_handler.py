@@ -1,3 +1,5 @@
+import asyncio
+import io
 import os
 import time
 from telegram import File
@@ -33,14 +35,24 @@ class TelegramImageHandler:
                 f"user_{user_id}_{photo_file.file_id}.jpg"
             )
             
-            await photo_file.download_to_drive(file_path)
-            logger.info(f"Fotoğraf indirildi: {file_path}")
+            # download_to_drive dosyayı event loop üzerinde senkron yazar; içerik
+            # belleğe alınıp diske yazma işi thread havuzuna devredilir
+            buffer = io.BytesIO()
+            await photo_file.download_to_memory(buffer)
+            await asyncio.to_thread(self._write_file, file_path, buffer.getbuffer())
+            logger.info("Fotoğraf indirildi: %s", file_path)
             return file_path
             
         except Exception as e:
-            logger.error(f"Fotoğraf indirme hatası: {e}")
+            logger.error("Fotoğraf indirme hatası: %s", e)
             raise
     
+    @staticmethod
+    def _write_file(file_path: str, data) -> None:
+        """İçeriği diske yaz"""
+        with open(file_path, 'wb') as f:
+            f.write(data)
+    
     def cleanup_file(self, file_path: str):
         """
         Geçici dosyayı sil
@@ -51,9 +63,9 @@ class TelegramImageHandler:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-                logger.info(f"Dosya silindi: {file_path}")
+                logger.info("Dosya silindi: %s", file_path)
         except Exception as e:
-            logger.error(f"Dosya silme hatası: {e}")
+            logger.error("Dosya silme hatası: %s", e)
     
     def cleanup_old_files(self, max_age_hours: int = 24):
         """
@@ -63,17 +75,18 @@ class TelegramImageHandler:
             max_age_hours: Maksimum dosya yaşı (saat)
         """
         try:
-            current_time = time.time()
-            max_age_seconds = max_age_hours * 3600
+            cutoff = time.time() - max_age_hours * 3600
             
-            for filename in os.listdir(self.download_dir):
-                file_path = os.path.join(self.download_dir, filename)
-                
-                if os.path.isfile(file_path):
-                    file_age = current_time - os.path.getmtime(file_path)
-                    
-                    if file_age > max_age_seconds:
-                        self.cleanup_file(file_path)
+            # scandir girdileri tür bilgisini dizin okumasından alır; dosya başına
+            # ayrı isfile/getmtime çağrısı yerine tek stat yeterli olur
+            with os.scandir(self.download_dir) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        try:
+                            os.remove(entry.path)
+                            logger.info("Dosya silindi: %s", entry.path)
+                        except OSError as e:
+                            logger.warning("Dosya silinemedi: %s (%s)", entry.path, e)
                         
         except Exception as e:
-            logger.error(f"Eski dosya temizleme hatası: {e}")
+            logger.error("Eski dosya temizleme hatası: %s", e)
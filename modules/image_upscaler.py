@@ -1,12 +1,32 @@
+import asyncio
+import hashlib
+import httpx
 import replicate
-import requests
 import os
-from typing import Optional, Dict
+import time
+from typing import Optional, Dict, Tuple
 import logging
 from PIL import Image
 
+from config import UPSCALE_CACHE_TTL, UPSCALE_CACHE_SIZE
+
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # İndirmede diske yazılan parça boyutu (bayt)
+HTTP_POOL_SIZE = 10  # Açık tutulan en fazla bağlantı sayısı
+HTTP_CONNECT_RETRIES = 3  # Bağlantı kurulamazsa yeniden deneme sayısı
+UPSCALE_MODEL = "nightmareai/real-esrgan:42fed1c4974146d4d2414e2be2c5277c7fcf05fcc3a73abf41610695738c1d7b"
+
+
+def _file_sha256(path: str) -> str:
+    """Dosyanın SHA-256 özetini, dosyayı belleğe tamamen almadan hesapla"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class ImageUpscaler:
     """Replicate API ile görüntü yükseltme (4x Real-ESRGAN)"""
     
@@ -16,9 +36,34 @@ class ImageUpscaler:
             api_token: Replicate API token
         """
         self.api_token = api_token
-        os.environ["REPLICATE_API_TOKEN"] = api_token
+        # Tek Replicate istemcisi; bağlantı havuzu çağrılar arasında yeniden kullanılır
+        self._replicate = replicate.Client(api_token=api_token)
+        # İndirmeler için paylaşılan bağlantı havuzu; ilk kullanımda oluşturulur
+        self._client: Optional[httpx.AsyncClient] = None
+        # Görüntü içeriğinin SHA-256 özeti -> (yükseltilmiş görüntü URL'i, önbelleğe alınma zamanı)
+        self._cache: Dict[str, Tuple[str, float]] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Paylaşılan HTTP istemcisini döndür"""
+        if self._client is None:
+            # transport verildiğinde havuz sınırları transport üzerinde tanımlanmalı
+            transport = httpx.AsyncHTTPTransport(
+                retries=HTTP_CONNECT_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_SIZE,
+                    max_keepalive_connections=HTTP_POOL_SIZE
+                )
+            )
+            self._client = httpx.AsyncClient(timeout=60, transport=transport)  # Replicate için timeout artırıldı
+        return self._client
+    
+    async def close(self):
+        """HTTP istemcisinin bağlantılarını kapat"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         
-    def upscale_image(self, image_path: str) -> Optional[str]:
+    async def upscale_image(self, image_path: str) -> Optional[str]:
         """
         Görüntü kalitesini artır (4x upscaling)
         
@@ -29,12 +74,20 @@ class ImageUpscaler:
             Yükseltilmiş görüntü URL'i veya None
         """
         try:
-            logger.info(f"Upscaling başlatılıyor: {image_path}")
+            # Aynı görüntü (kullanıcı tekrar denediğinde) yeniden ücretli tahmin başlatmaz
+            digest = await asyncio.to_thread(_file_sha256, image_path)
+            entry = self._cache.get(digest)
+            if entry is not None and time.monotonic() - entry[1] < UPSCALE_CACHE_TTL:
+                logger.info("Upscale önbellekten döndü: %s", image_path)
+                return entry[0]
+            
+            logger.info("Upscaling başlatılıyor: %s", image_path)
             
             # Replicate model: Real-ESRGAN (4x upscaling)
+            # async_run tahmin durumunu event loop'u bloklamadan yoklar
             with open(image_path, "rb") as image_file:
-                output = replicate.run(
-                    "nightmareai/real-esrgan:42fed1c4974146d4d2414e2be2c5277c7fcf05fcc3a73abf41610695738c1d7b",
+                output = await self._replicate.async_run(
+                    UPSCALE_MODEL,
                     input={
                         "image": image_file,
                         "scale": 4,
@@ -44,17 +97,21 @@ class ImageUpscaler:
             
             # Output bir URL string
             if output:
-                logger.info(f"Upscale başarılı: {output}")
+                logger.info("Upscale başarılı: %s", output)
+                self._cache.pop(digest, None)
+                self._cache[digest] = (output, time.monotonic())
+                if len(self._cache) > UPSCALE_CACHE_SIZE:
+                    self._cache.pop(next(iter(self._cache)), None)
                 return output
             else:
                 logger.error("Replicate boş sonuç döndü")
                 return None
                 
         except Exception as e:
-            logger.error(f"Upscale hatası: {e}")
+            logger.error("Upscale hatası: %s", e)
             return None
     
-    def download_image(self, url: str, output_path: str) -> bool:
+    async def download_image(self, url: str, output_path: str) -> bool:
         """
         URL'den görüntü indir
         
@@ -66,36 +123,50 @@ class ImageUpscaler:
             Başarılı ise True
         """
         try:
-            response = requests.get(url, timeout=60)  # Replicate için timeout artırıldı
-            if response.status_code == 200:
+            # Görüntü belleğe tamamen alınmadan parça parça diske yazılır
+            async with self._get_client().stream("GET", url) as response:
+                if response.status_code != 200:
+                    return False
                 with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                logger.info(f"Görüntü indirildi: {output_path}")
-                return True
-            return False
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            logger.info("Görüntü indirildi: %s", output_path)
+            return True
         except Exception as e:
-            logger.error(f"İndirme hatası: {e}")
+            logger.error("İndirme hatası: %s", e)
+            # Yarım kalan dosyayı bırakma
+            if os.path.exists(output_path):
+                os.remove(output_path)
             return False
     
-    def get_image_info(self, image_path: str) -> Dict:
+    async def get_image_info(self, image_path: str) -> Dict:
         """
         Görüntü bilgilerini al (boyut, format, vb.)
         
+        Dosya okuması thread havuzunda yapılır; event loop bloklanmaz.
+        
         Args:
             image_path: Görüntü dosyası yolu
             
         Returns:
-            Görüntü bilgileri dict
+            Görüntü bilgileri dict (hata durumunda boş)
         """
+        return await asyncio.to_thread(self._read_image_info, image_path)
+    
+    @staticmethod
+    def _read_image_info(image_path: str) -> Dict:
+        """get_image_info'nun senkron gövdesi"""
         try:
-            with Image.open(image_path) as img:
+            # Image.open yalnızca başlığı okur, piksel verisi çözülmez; dosya
+            # boyutu ayrı bir stat çağrısı yerine açık dosyadan alınır
+            with open(image_path, 'rb') as f, Image.open(f) as img:
                 return {
                     'width': img.width,
                     'height': img.height,
                     'format': img.format,
                     'mode': img.mode,
-                    'size_mb': os.path.getsize(image_path) / (1024 * 1024)
+                    'size_mb': os.fstat(f.fileno()).st_size / (1024 * 1024)
                 }
         except Exception as e:
-            logger.error(f"Görüntü bilgisi alma hatası: {e}")
+            logger.error("Görüntü bilgisi alma hatası: %s", e)
             return {}
@@ -42,10 +42,10 @@ class NotesManager:
             
             # Notu ekle
             note = self.db_manager.add_note(user_id, category, content)
-            logger.info(f"Not eklendi: kullanıcı={user_id}, kategori={category}")
+            logger.info("Not eklendi: kullanıcı=%s, kategori=%s", user_id, category)
             return note
         except Exception as e:
-            logger.error(f"Not ekleme hatası: {e}")
+            logger.error("Not ekleme hatası: %s", e)
             raise
     
     def get_all_notes(self, user_id: int) -> List[Note]:
@@ -60,10 +60,10 @@ class NotesManager:
         """
         try:
             notes = self.db_manager.get_notes(user_id)
-            logger.info(f"Notlar getirildi: kullanıcı={user_id}, adet={len(notes)}")
+            logger.debug("Notlar getirildi: kullanıcı=%s, adet=%s", user_id, len(notes))
             return notes
         except Exception as e:
-            logger.error(f"Not getirme hatası: {e}")
+            logger.error("Not getirme hatası: %s", e)
             return []
     
     def get_notes_by_category(self, user_id: int, category: str) -> List[Note]:
@@ -80,10 +80,10 @@ class NotesManager:
         try:
             category = validate_category(category)
             notes = self.db_manager.get_notes(user_id, category)
-            logger.info(f"Kategori notları getirildi: kullanıcı={user_id}, kategori={category}, adet={len(notes)}")
+            logger.debug("Kategori notları getirildi: kullanıcı=%s, kategori=%s, adet=%s", user_id, category, len(notes))
             return notes
         except Exception as e:
-            logger.error(f"Kategori notu getirme hatası: {e}")
+            logger.error("Kategori notu getirme hatası: %s", e)
             return []
     
     def search_notes(self, user_id: int, keyword: str) -> List[Note]:
@@ -99,10 +99,10 @@ class NotesManager:
         """
         try:
             notes = self.db_manager.search_notes(user_id, keyword)
-            logger.info(f"Not araması yapıldı: kullanıcı={user_id}, kelime={keyword}, bulunan={len(notes)}")
+            logger.debug("Not araması yapıldı: kullanıcı=%s, kelime=%s, bulunan=%s", user_id, keyword, len(notes))
             return notes
         except Exception as e:
-            logger.error(f"Not arama hatası: {e}")
+            logger.error("Not arama hatası: %s", e)
             return []
     
     def delete_note(self, note_id: int, user_id: int) -> bool:
@@ -119,12 +119,12 @@ class NotesManager:
         try:
             success = self.db_manager.delete_note(note_id, user_id)
             if success:
-                logger.info(f"Not silindi: id={note_id}, kullanıcı={user_id}")
+                logger.info("Not silindi: id=%s, kullanıcı=%s", note_id, user_id)
             else:
-                logger.warning(f"Not bulunamadı: id={note_id}, kullanıcı={user_id}")
+                logger.warning("Not bulunamadı: id=%s, kullanıcı=%s", note_id, user_id)
             return success
         except Exception as e:
-            logger.error(f"Not silme hatası: {e}")
+            logger.error("Not silme hatası: %s", e)
             return False
     
     def get_categories(self, user_id: int) -> List[str]:
@@ -138,13 +138,11 @@ class NotesManager:
             Kategori listesi
         """
         try:
-            notes = self.db_manager.get_notes(user_id)
-            categories = list(set(note.category for note in notes))
-            categories.sort()
-            logger.info(f"Kategoriler getirildi: kullanıcı={user_id}, adet={len(categories)}")
+            categories = self.db_manager.get_note_categories(user_id)
+            logger.debug("Kategoriler getirildi: kullanıcı=%s, adet=%s", user_id, len(categories))
             return categories
         except Exception as e:
-            logger.error(f"Kategori getirme hatası: {e}")
+            logger.error("Kategori getirme hatası: %s", e)
             return []
     
     def get_note_count(self, user_id: int, category: str = None) -> int:
@@ -159,11 +157,7 @@ class NotesManager:
             Not sayısı
         """
         try:
-            if category:
-                notes = self.db_manager.get_notes(user_id, category)
-            else:
-                notes = self.db_manager.get_notes(user_id)
-            return len(notes)
+            return self.db_manager.count_notes(user_id, category)
         except Exception as e:
-            logger.error(f"Not sayısı getirme hatası: {e}")
+            logger.error("Not sayısı getirme hatası: %s", e)
             return 0
@@ -2,7 +2,7 @@
 Ajanda ve Görev Yönetim Sistemi
 """
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
 
 from database import DatabaseManager
@@ -11,6 +11,18 @@ from utils.helpers import parse_date
 
 logger = logging.getLogger(__name__)
 
+# Kullanıcının yazdığı öncelik (küçük harfe çevrilmiş) -> PriorityLevel
+_PRIORITY_MAP = {
+    'düşük': PriorityLevel.LOW,
+    'dusuk': PriorityLevel.LOW,
+    'low': PriorityLevel.LOW,
+    'orta': PriorityLevel.MEDIUM,
+    'medium': PriorityLevel.MEDIUM,
+    'yüksek': PriorityLevel.HIGH,
+    'yuksek': PriorityLevel.HIGH,
+    'high': PriorityLevel.HIGH,
+}
+
 
 class ScheduleManager:
     """Ajanda ve görev yönetim sınıfı"""
@@ -42,18 +54,7 @@ class ScheduleManager:
         """
         try:
             # Öncelik seviyesini belirle
-            priority_map = {
-                'düşük': PriorityLevel.LOW,
-                'dusuk': PriorityLevel.LOW,
-                'low': PriorityLevel.LOW,
-                'orta': PriorityLevel.MEDIUM,
-                'medium': PriorityLevel.MEDIUM,
-                'yüksek': PriorityLevel.HIGH,
-                'yuksek': PriorityLevel.HIGH,
-                'high': PriorityLevel.HIGH
-            }
-            
-            priority_level = priority_map.get(priority.lower(), PriorityLevel.MEDIUM)
+            priority_level = _PRIORITY_MAP.get(priority.lower(), PriorityLevel.MEDIUM)
             
             # Tarihi parse et
             due_date = None
@@ -69,10 +70,10 @@ class ScheduleManager:
                 due_date=due_date
             )
             
-            logger.info(f"Görev eklendi: kullanıcı={user_id}, başlık={title}")
+            logger.info("Görev eklendi: kullanıcı=%s, başlık=%s", user_id, title)
             return task
         except Exception as e:
-            logger.error(f"Görev ekleme hatası: {e}")
+            logger.error("Görev ekleme hatası: %s", e)
             raise
     
     def get_all_tasks(self, user_id: int, include_completed: bool = False) -> List[Task]:
@@ -88,10 +89,10 @@ class ScheduleManager:
         """
         try:
             tasks = self.db_manager.get_tasks(user_id, include_completed)
-            logger.info(f"Görevler getirildi: kullanıcı={user_id}, adet={len(tasks)}")
+            logger.debug("Görevler getirildi: kullanıcı=%s, adet=%s", user_id, len(tasks))
             return tasks
         except Exception as e:
-            logger.error(f"Görev getirme hatası: {e}")
+            logger.error("Görev getirme hatası: %s", e)
             return []
     
     def get_today_tasks(self, user_id: int) -> List[Task]:
@@ -106,10 +107,10 @@ class ScheduleManager:
         """
         try:
             tasks = self.db_manager.get_today_tasks(user_id)
-            logger.info(f"Bugünkü görevler getirildi: kullanıcı={user_id}, adet={len(tasks)}")
+            logger.debug("Bugünkü görevler getirildi: kullanıcı=%s, adet=%s", user_id, len(tasks))
             return tasks
         except Exception as e:
-            logger.error(f"Bugünkü görev getirme hatası: {e}")
+            logger.error("Bugünkü görev getirme hatası: %s", e)
             return []
     
     def get_upcoming_tasks(self, user_id: int, days: int = 7) -> List[Task]:
@@ -124,25 +125,14 @@ class ScheduleManager:
             Yaklaşan görevler
         """
         try:
-            from datetime import timedelta
             now = datetime.now()
-            end_date = now + timedelta(days=days)
-            
-            all_tasks = self.db_manager.get_tasks(user_id, include_completed=False)
-            
-            # Tarihe göre filtrele
-            upcoming_tasks = [
-                task for task in all_tasks
-                if task.due_date and now <= task.due_date <= end_date
-            ]
-            
-            # Tarihe göre sırala
-            upcoming_tasks.sort(key=lambda x: x.due_date)
-            
-            logger.info(f"Yaklaşan görevler getirildi: kullanıcı={user_id}, adet={len(upcoming_tasks)}")
+            upcoming_tasks = self.db_manager.get_tasks_between(
+                user_id, now, now + timedelta(days=days)
+            )
+            logger.debug("Yaklaşan görevler getirildi: kullanıcı=%s, adet=%s", user_id, len(upcoming_tasks))
             return upcoming_tasks
         except Exception as e:
-            logger.error(f"Yaklaşan görev getirme hatası: {e}")
+            logger.error("Yaklaşan görev getirme hatası: %s", e)
             return []
     
     def complete_task(self, task_id: int, user_id: int) -> bool:
@@ -159,12 +149,12 @@ class ScheduleManager:
         try:
             success = self.db_manager.update_task_status(task_id, user_id, True)
             if success:
-                logger.info(f"Görev tamamlandı: id={task_id}, kullanıcı={user_id}")
+                logger.info("Görev tamamlandı: id=%s, kullanıcı=%s", task_id, user_id)
             else:
-                logger.warning(f"Görev bulunamadı: id={task_id}, kullanıcı={user_id}")
+                logger.warning("Görev bulunamadı: id=%s, kullanıcı=%s", task_id, user_id)
             return success
         except Exception as e:
-            logger.error(f"Görev tamamlama hatası: {e}")
+            logger.error("Görev tamamlama hatası: %s", e)
             return False
     
     def uncomplete_task(self, task_id: int, user_id: int) -> bool:
@@ -181,12 +171,12 @@ class ScheduleManager:
         try:
             success = self.db_manager.update_task_status(task_id, user_id, False)
             if success:
-                logger.info(f"Görev tamamlanması geri alındı: id={task_id}, kullanıcı={user_id}")
+                logger.info("Görev tamamlanması geri alındı: id=%s, kullanıcı=%s", task_id, user_id)
             else:
-                logger.warning(f"Görev bulunamadı: id={task_id}, kullanıcı={user_id}")
+                logger.warning("Görev bulunamadı: id=%s, kullanıcı=%s", task_id, user_id)
             return success
         except Exception as e:
-            logger.error(f"Görev güncelleme hatası: {e}")
+            logger.error("Görev güncelleme hatası: %s", e)
             return False
     
     def delete_task(self, task_id: int, user_id: int) -> bool:
@@ -203,12 +193,12 @@ class ScheduleManager:
         try:
             success = self.db_manager.delete_task(task_id, user_id)
             if success:
-                logger.info(f"Görev silindi: id={task_id}, kullanıcı={user_id}")
+                logger.info("Görev silindi: id=%s, kullanıcı=%s", task_id, user_id)
             else:
-                logger.warning(f"Görev bulunamadı: id={task_id}, kullanıcı={user_id}")
+                logger.warning("Görev bulunamadı: id=%s, kullanıcı=%s", task_id, user_id)
             return success
         except Exception as e:
-            logger.error(f"Görev silme hatası: {e}")
+            logger.error("Görev silme hatası: %s", e)
             return False
     
     def get_task_count(self, user_id: int, completed: bool = None) -> int:
@@ -223,12 +213,7 @@ class ScheduleManager:
             Görev sayısı
         """
         try:
-            if completed is None:
-                tasks = self.db_manager.get_tasks(user_id, include_completed=True)
-            else:
-                all_tasks = self.db_manager.get_tasks(user_id, include_completed=True)
-                tasks = [t for t in all_tasks if t.is_completed == completed]
-            return len(tasks)
+            return self.db_manager.count_tasks(user_id, completed)
         except Exception as e:
-            logger.error(f"Görev sayısı getirme hatası: {e}")
+            logger.error("Görev sayısı getirme hatası: %s", e)
             return 0
@@ -2,11 +2,17 @@
 Telegram Bot Arayüzü
 Kullanıcı etkileşimi için komut tabanlı bot
 """
+import asyncio
+import concurrent.futures
+import functools
 import logging
+import re
 from datetime import datetime
+from typing import Dict, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application, 
+    BaseUpdateProcessor,
     CommandHandler, 
     MessageHandler, 
     CallbackQueryHandler,
@@ -14,22 +20,116 @@ from telegram.ext import (
     filters
 )
 
-try:
-    from PIL import Image
-except ImportError:
-    Image = None
-
-from config import TELEGRAM_BOT_TOKEN
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_WEBHOOK_URL, TELEGRAM_WEBHOOK_PORT,
+    TELEGRAM_WEBHOOK_SECRET, TELEGRAM_POLL_TIMEOUT, TELEGRAM_CONCURRENT_UPDATES,
+)
 from database import DatabaseManager
 from modules.ai_assistant import AIAssistant
 from modules.ai_teacher import AITeacher
 from modules.web_search import WebSearchAssistant
 from modules.notes_manager import NotesManager
 from modules.schedule_manager import ScheduleManager
-from utils.helpers import format_note_list, format_task_list, format_date
+from utils.helpers import format_note_list, format_task_list, format_date, parse_date
 
 logger = logging.getLogger(__name__)
 
+# Karakter taraması C tarafında yapılır (Python düzeyinde üreteç yok)
+_HAS_DIGIT = re.compile(r'\d').search
+
+# %0..%100 için 10 dilimlik ilerleme çubukları, onda birlik seviyeye göre
+_PROGRESS_BARS = tuple('█' * i + '░' * (10 - i) for i in range(11))
+
+
+def _progress_bar(pct: float) -> str:
+    """Yüzdeye karşılık gelen ilerleme çubuğu"""
+    return _PROGRESS_BARS[min(int(pct) // 10, 10)]
+
+
+def _with_db_user(handler):
+    """
+    Handler'a mesajı gönderen kullanıcının veritabanı kaydını db_user olarak ver
+
+    Kullanıcı bilgileri de iletildiği için ad/kullanıcı adı değişiklikleri
+    kayda yansır; önbellekteki kullanıcı için thread havuzuna gidilmez.
+    """
+    @functools.wraps(handler)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        db_user = await self.db_manager.aio.get_or_create_user(
+            telegram_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+        )
+        return await handler(self, update, context, db_user)
+    return wrapper
+
+
+def _find_course(courses, course_name: str):
+    """Ders adını büyük/küçük harf duyarsız eşle; tam eşleşme kısmi eşleşmeden önce gelir"""
+    key = course_name.lower()
+    partial = None
+    for course in courses:
+        name = course['name'].lower()
+        if name == key:
+            return course
+        if partial is None and key in name:
+            partial = course
+    return partial
+
+
+class _PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Farklı sohbetlerin güncellemelerini eşzamanlı, aynı sohbetinkileri geliş sırasıyla işler
+
+    Böylece bir sohbetteki yavaş /ogren isteği başka sohbetleri bekletmez; aynı sohbette
+    ise quiz gibi durum tutan akışlar sırası bozulmadan ilerler.
+    """
+
+    # Temel sınıfın sınırı; asıl sınır aşağıdaki kendi semaforumuzdur. Temel sınıf yeri
+    # sohbet kilidinden önce alır; sırasını bekleyen güncellemeler yer tutup tek bir
+    # sohbetin tüm sohbetleri tıkamasına yol açmasın diye pratikte sınırsız bırakılır
+    _BASE_LIMIT = 2 ** 31 - 1
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(self._BASE_LIMIT)
+        # Yalnızca gerçekten çalışan güncellemeleri sınırlar (sohbet kilidinin içinde alınır)
+        self._running = asyncio.BoundedSemaphore(max_concurrent_updates)
+        # Sohbet başına kilit ve kilidi bekleyen/tutan güncelleme sayısı
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = {}
+
+    async def do_process_update(self, update, coroutine):
+        chat = getattr(update, 'effective_chat', None)
+        if chat is None:
+            async with self._running:
+                await coroutine
+            return
+
+        chat_id = chat.id
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        self._pending[chat_id] = self._pending.get(chat_id, 0) + 1
+        try:
+            # asyncio.Lock bekleyenleri FIFO sırasıyla uyandırır
+            async with lock:
+                async with self._running:
+                    await coroutine
+        finally:
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                # Boştaki sohbetlerin kilitleri birikmesin
+                del self._pending[chat_id]
+                del self._chat_locks[chat_id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
 
 class TelegramBot:
     """Telegram Bot Sınıfı"""
@@ -43,6 +143,85 @@ class TelegramBot:
         "(/not_ekle, /gorev_ekle gibi)."
     )
     
+    # Sabit yanıt metinleri sınıf yüklenirken bir kez kurulur
+    WELCOME_MESSAGE = """
+🤖 *Merhaba {first_name}!*
+
+Ben senin akıllı kişisel asistanınım. Sana şu konularda yardımcı olabilirim:
+
+📚 *Ders Yardımı*
+• AI destekli soru cevaplama
+• Not özetleme ve açıklama
+
+📝 *Not Yönetimi*
+• Kategorilere göre not alma
+• Not arama ve listeleme
+
+📅 *Ajanda & Görevler*
+• Görev ekleme ve takibi
+• Bugünkü görevleri görüntüleme
+
+⏰ *Hatırlatıcılar*
+• Ödev ve sınav hatırlatıcıları
+• Randevu bildirimleri
+
+Kullanılabilir komutları görmek için /yardim yazabilirsin!
+"""
+    
+    _HELP_COMMANDS = """
+📖 *Komut Listesi*
+
+*AI Sohbet:*
+/sohbet [mesajınız] - AI ile sohbet et
+
+*Not İşlemleri:*
+/not_ekle [kategori] [not] - Yeni not ekle
+/notlar - Tüm notları listele
+/not_ara [kelime] - Notlarda ara
+/not_sil [id] - Not sil
+
+*Görev İşlemleri:*
+/gorev_ekle [görev] [tarih] - Yeni görev ekle
+/gorevler - Tüm görevleri listele
+/bugun - Bugünkü görevler ve öğrenilecek konular
+/gorev_tamamla [id] - Görevi tamamla
+/gorev_sil [id] - Görev sil
+
+*Hatırlatıcı:*
+/hatirlatici [mesaj] [tarih/saat] - Hatırlatıcı ekle
+
+*🎓 AI Öğretmen:*
+/dersler_yukle - 6 dersi yükle
+/dersler - Tüm dersleri listele
+/ders_detay [ders_adı] - Ders detayları
+/ogren [ders] [konu] - AI konu anlatımı
+/devam - Kaldığın yerden devam et
+/quiz [ders] - Quiz çöz
+/quiz_sonuc - Son quiz sonuçları
+/ilerleme - Genel ilerleme raporu
+/istatistik - Detaylı istatistikler
+/plan - 14 haftalık çalışma planı
+"""
+    _HELP_UPSCALE = """
+*🎨 Görüntü Yükseltme:*
+/upscale - Fotoğraf kalitesini artır (4x)
+/upscale_yardim - Detaylı bilgi
+"""
+    _HELP_FOOTER = """
+*Diğer:*
+/start - Bot'u başlat
+/yardim - Bu yardım mesajı
+
+*Örnekler:*
+`/not_ekle Matematik Pisagor teoremi: a² + b² = c²`
+`/gorev_ekle Fizik ödevi yap 25.12.2024`
+`/ogren Yapay_Zeka gradient_descent`
+`/quiz Yapay_Zeka`
+"""
+    HELP_TEXT = _HELP_COMMANDS + _HELP_FOOTER
+    # Görüntü yükseltme aktifken yardım metnine ilgili komutlar eklenir
+    HELP_TEXT_WITH_UPSCALE = _HELP_COMMANDS + _HELP_UPSCALE + _HELP_FOOTER
+    
     def __init__(self, db_manager: DatabaseManager, ai_assistant: AIAssistant,
                  notes_manager: NotesManager, schedule_manager: ScheduleManager,
                  replicate_api_token: str = None, ai_teacher: AITeacher = None):
@@ -82,12 +261,23 @@ class TelegramBot:
             logger.info("✅ Replicate görüntü yükseltme modülü başlatıldı (4x upscaling)")
         else:
             logger.warning("⚠️ REPLICATE_API_TOKEN bulunamadı. Görüntü yükseltme özellikleri çalışmayacak.")
+        self._help_text = self.HELP_TEXT_WITH_UPSCALE if self.image_upscaler else self.HELP_TEXT
         
         if not TELEGRAM_BOT_TOKEN:
             raise ValueError("TELEGRAM_BOT_TOKEN bulunamadı!")
         
+        # Bot'un event loop'u; çalışmaya başlayınca post_init'te alınır
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        
         # Bot uygulamasını oluştur
-        self.application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+        self.application = (
+            Application.builder()
+            .token(TELEGRAM_BOT_TOKEN)
+            .concurrent_updates(_PerChatUpdateProcessor(TELEGRAM_CONCURRENT_UPDATES))
+            .post_init(self._capture_loop)
+            .post_shutdown(self._close_clients)
+            .build()
+        )
         
         # Komut handler'larını ekle
         self._register_handlers()
@@ -128,9 +318,9 @@ class TelegramBot:
             self.application.add_handler(CommandHandler("upscale", self.upscale_command))
             self.application.add_handler(CommandHandler("upscale_yardim", self.upscale_help))
             
-            # Photo handler
+            # Photo handler; yükseltme 10-15 sn sürdüğünden sohbeti bekletmeden arka planda çalışır
             self.application.add_handler(
-                MessageHandler(filters.PHOTO, self.handle_photo)
+                MessageHandler(filters.PHOTO, self.handle_photo, block=False)
             )
             
             logger.info("✅ Görüntü yükseltme komutları kaydedildi")
@@ -154,95 +344,19 @@ class TelegramBot:
         user = update.effective_user
         
         # Kullanıcıyı veritabanına kaydet
-        self.db_manager.get_or_create_user(
+        await self.db_manager.aio.get_or_create_user(
             telegram_id=user.id,
             username=user.username,
             first_name=user.first_name,
             last_name=user.last_name
         )
         
-        welcome_message = f"""
-🤖 *Merhaba {user.first_name}!*
-
-Ben senin akıllı kişisel asistanınım. Sana şu konularda yardımcı olabilirim:
-
-📚 *Ders Yardımı*
-• AI destekli soru cevaplama
-• Not özetleme ve açıklama
-
-📝 *Not Yönetimi*
-• Kategorilere göre not alma
-• Not arama ve listeleme
-
-📅 *Ajanda & Görevler*
-• Görev ekleme ve takibi
-• Bugünkü görevleri görüntüleme
-
-⏰ *Hatırlatıcılar*
-• Ödev ve sınav hatırlatıcıları
-• Randevu bildirimleri
-
-Kullanılabilir komutları görmek için /yardim yazabilirsin!
-"""
+        welcome_message = self.WELCOME_MESSAGE.format(first_name=user.first_name)
         await update.message.reply_text(welcome_message, parse_mode='Markdown')
     
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Yardım mesajı - /yardim"""
-        help_text = """
-📖 *Komut Listesi*
-
-*AI Sohbet:*
-/sohbet [mesajınız] - AI ile sohbet et
-
-*Not İşlemleri:*
-/not_ekle [kategori] [not] - Yeni not ekle
-/notlar - Tüm notları listele
-/not_ara [kelime] - Notlarda ara
-/not_sil [id] - Not sil
-
-*Görev İşlemleri:*
-/gorev_ekle [görev] [tarih] - Yeni görev ekle
-/gorevler - Tüm görevleri listele
-/bugun - Bugünkü görevler ve öğrenilecek konular
-/gorev_tamamla [id] - Görevi tamamla
-/gorev_sil [id] - Görev sil
-
-*Hatırlatıcı:*
-/hatirlatici [mesaj] [tarih/saat] - Hatırlatıcı ekle
-
-*🎓 AI Öğretmen:*
-/dersler_yukle - 6 dersi yükle
-/dersler - Tüm dersleri listele
-/ders_detay [ders_adı] - Ders detayları
-/ogren [ders] [konu] - AI konu anlatımı
-/devam - Kaldığın yerden devam et
-/quiz [ders] - Quiz çöz
-/quiz_sonuc - Son quiz sonuçları
-/ilerleme - Genel ilerleme raporu
-/istatistik - Detaylı istatistikler
-/plan - 14 haftalık çalışma planı
-"""
-
-        # Görüntü yükseltme komutları ekle (eğer özellik aktifse)
-        if self.image_upscaler:
-            help_text += """
-*🎨 Görüntü Yükseltme:*
-/upscale - Fotoğraf kalitesini artır (4x)
-/upscale_yardim - Detaylı bilgi
-"""
-
-        help_text += """
-*Diğer:*
-/start - Bot'u başlat
-/yardim - Bu yardım mesajı
-
-*Örnekler:*
-`/not_ekle Matematik Pisagor teoremi: a² + b² = c²`
-`/gorev_ekle Fizik ödevi yap 25.12.2024`
-`/ogren Yapay_Zeka gradient_descent`
-`/quiz Yapay_Zeka`
-"""
-        await update.message.reply_text(help_text, parse_mode='Markdown')
+        await update.message.reply_text(self._help_text, parse_mode='Markdown')
     
     async def chat_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """AI ile sohbet - /sohbet"""
@@ -261,7 +375,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
         
         # AI'dan yanıt al
-        response = self.ai_assistant.chat(user_id, message)
+        response = await self.ai_assistant.chat(user_id, message)
         
         await update.message.reply_text(response)
     
@@ -280,7 +394,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         content = " ".join(context.args[1:])
         
         try:
-            note = self.notes_manager.add_note(user_id, category, content)
+            note = await asyncio.to_thread(self.notes_manager.add_note, user_id, category, content)
             await update.message.reply_text(
                 f"✅ Not eklendi!\n"
                 f"📚 Kategori: {note.category}\n"
@@ -288,14 +402,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
                 f"🆔 ID: {note.id}"
             )
         except Exception as e:
-            logger.error(f"Not ekleme hatası: {e}")
+            logger.error("Not ekleme hatası: %s", e)
             await update.message.reply_text("❌ Not eklenirken bir hata oluştu.")
     
     async def list_notes_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Notları listele - /notlar"""
         user_id = update.effective_user.id
         
-        notes = self.notes_manager.get_all_notes(user_id)
+        notes = await asyncio.to_thread(self.notes_manager.get_all_notes, user_id)
         
         if not notes:
             await update.message.reply_text("Henüz not bulunmuyor. /not_ekle komutu ile not ekleyebilirsin.")
@@ -319,7 +433,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             return
         
         keyword = " ".join(context.args)
-        notes = self.notes_manager.search_notes(user_id, keyword)
+        notes = await asyncio.to_thread(self.notes_manager.search_notes, user_id, keyword)
         
         if not notes:
             await update.message.reply_text(f"'{keyword}' ile ilgili not bulunamadı.")
@@ -344,7 +458,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         
         try:
             note_id = int(context.args[0])
-            success = self.notes_manager.delete_note(note_id, user_id)
+            success = await asyncio.to_thread(self.notes_manager.delete_note, note_id, user_id)
             
             if success:
                 await update.message.reply_text(f"✅ Not silindi (ID: {note_id})")
@@ -371,14 +485,15 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         # Son argüman tarih gibi görünüyor mu?
         if len(args) > 1:
             last_arg = args[-1]
-            if any(char.isdigit() for char in last_arg):
+            if _HAS_DIGIT(last_arg):
                 due_date_str = last_arg
                 args = args[:-1]
         
         title = " ".join(args)
         
         try:
-            task = self.schedule_manager.add_task(
+            task = await asyncio.to_thread(
+                self.schedule_manager.add_task,
                 user_id=user_id,
                 title=title,
                 priority="orta",
@@ -394,14 +509,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
                 f"🆔 ID: {task.id}"
             )
         except Exception as e:
-            logger.error(f"Görev ekleme hatası: {e}")
+            logger.error("Görev ekleme hatası: %s", e)
             await update.message.reply_text("❌ Görev eklenirken bir hata oluştu.")
     
     async def list_tasks_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Görevleri listele - /gorevler"""
         user_id = update.effective_user.id
         
-        tasks = self.schedule_manager.get_all_tasks(user_id, include_completed=False)
+        tasks = await asyncio.to_thread(self.schedule_manager.get_all_tasks, user_id, include_completed=False)
         
         if not tasks:
             await update.message.reply_text("Henüz görev bulunmuyor. /gorev_ekle komutu ile görev ekleyebilirsin.")
@@ -420,8 +535,13 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         message_parts = []
 
+        # Görevler ve sıradaki konular birbirinden bağımsız; iki sorgu aynı anda çalışır
+        tasks, next_topics = await asyncio.gather(
+            asyncio.to_thread(self.schedule_manager.get_today_tasks, user_id),
+            self.db_manager.aio.get_next_topics(user_id, limit=3),
+        )
+
         # Bugünkü görevler
-        tasks = self.schedule_manager.get_today_tasks(user_id)
         if tasks:
             formatted_tasks = format_task_list(tasks)
             message_parts.append(f"📅 *Bugünkü Görevler* ({len(tasks)} adet)\n\n{formatted_tasks}")
@@ -429,13 +549,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             message_parts.append("📅 *Bugünkü Görevler*\nBugün için görev bulunmuyor. 🎉")
 
         # Sıradaki öğrenilecek konular
-        next_topics = self.db_manager.get_next_topics(user_id, limit=3)
         if next_topics:
-            topics_text = "📚 *Sıradaki Konular*\n"
-            for i, t in enumerate(next_topics, 1):
-                topics_text += f"{i}. {t['course_name']}: {t['topic_title']}\n"
-            topics_text += "\n💡 /ogren [ders] [konu] ile öğrenmeye başla!"
-            message_parts.append(topics_text)
+            topic_lines = "".join(
+                f"{i}. {t['course_name']}: {t['topic_title']}\n"
+                for i, t in enumerate(next_topics, 1)
+            )
+            message_parts.append(
+                f"📚 *Sıradaki Konular*\n{topic_lines}\n💡 /ogren [ders] [konu] ile öğrenmeye başla!"
+            )
 
         await update.message.reply_text(
             "\n\n━━━━━━━━━━━━━━━━━━━━━━\n\n".join(message_parts),
@@ -454,7 +575,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         
         try:
             task_id = int(context.args[0])
-            success = self.schedule_manager.complete_task(task_id, user_id)
+            success = await asyncio.to_thread(self.schedule_manager.complete_task, task_id, user_id)
             
             if success:
                 await update.message.reply_text(f"✅ Görev tamamlandı! (ID: {task_id}) 🎉")
@@ -475,7 +596,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         
         try:
             task_id = int(context.args[0])
-            success = self.schedule_manager.delete_task(task_id, user_id)
+            success = await asyncio.to_thread(self.schedule_manager.delete_task, task_id, user_id)
             
             if success:
                 await update.message.reply_text(f"✅ Görev silindi (ID: {task_id})")
@@ -500,7 +621,6 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         remind_date_str = args[-1]
         message = " ".join(args[:-1])
         
-        from utils.helpers import parse_date
         remind_at = parse_date(remind_date_str)
         
         if not remind_at:
@@ -510,7 +630,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             return
         
         try:
-            reminder = self.db_manager.add_reminder(
+            reminder = await self.db_manager.aio.add_reminder(
                 user_id=user_id,
                 message=message,
                 remind_at=remind_at
@@ -522,7 +642,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
                 f"📅 {format_date(remind_at)}"
             )
         except Exception as e:
-            logger.error(f"Hatırlatıcı ekleme hatası: {e}")
+            logger.error("Hatırlatıcı ekleme hatası: %s", e)
             await update.message.reply_text("❌ Hatırlatıcı eklenirken bir hata oluştu.")
     
     # ============ AI ÖĞRETMEN KOMUTLARI ============
@@ -627,49 +747,36 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         },
     ]
 
-    async def load_courses_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Önceden tanımlı dersleri yükle - /dersler_yukle"""
-        user = update.effective_user
-
-        db_user = self.db_manager.get_or_create_user(
-            telegram_id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-        )
+    LOAD_COURSES_REPLY = (
+        "✅ 6 ders yüklendi!\n\n"
+        "📚 Dersler:\n"
+        "1. Ön Yüz Programlama\n"
+        "2. İleri Programlama\n"
+        "3. Bilgisayar Destekli Çizim\n"
+        "4. Sayısal Tasarım\n"
+        "5. Yapay Zeka Uygulamaları\n"
+        "6. Sensörler ve Transdüserler\n\n"
+        "💡 /bugun ile bugün ne öğreneceğini gör!\n"
+        "📊 /ilerleme ile durumunu kontrol et!"
+    )
 
+    @_with_db_user
+    async def load_courses_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
+        """Önceden tanımlı dersleri yükle - /dersler_yukle"""
         await update.message.reply_text("⏳ Dersler yükleniyor...")
 
         try:
-            for course_data in self.PREDEFINED_COURSES:
-                course_id = self.db_manager.add_course(
-                    db_user.id, course_data["name"], course_data["description"]
-                )
-                for week, topic_title in enumerate(course_data["topics"], 1):
-                    self.db_manager.add_topic(course_id, topic_title, week)
+            await self.db_manager.aio.add_courses_with_topics(db_user.id, self.PREDEFINED_COURSES)
 
-            await update.message.reply_text(
-                "✅ 6 ders yüklendi!\n\n"
-                "📚 Dersler:\n"
-                "1. Ön Yüz Programlama\n"
-                "2. İleri Programlama\n"
-                "3. Bilgisayar Destekli Çizim\n"
-                "4. Sayısal Tasarım\n"
-                "5. Yapay Zeka Uygulamaları\n"
-                "6. Sensörler ve Transdüserler\n\n"
-                "💡 /bugun ile bugün ne öğreneceğini gör!\n"
-                "📊 /ilerleme ile durumunu kontrol et!"
-            )
+            await update.message.reply_text(self.LOAD_COURSES_REPLY)
         except Exception as e:
-            logger.error(f"Ders yükleme hatası: {e}")
+            logger.error("Ders yükleme hatası: %s", e)
             await update.message.reply_text("❌ Dersler yüklenirken bir hata oluştu.")
 
-    async def list_courses_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def list_courses_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """Tüm dersleri listele - /dersler"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
-        courses = self.db_manager.get_user_courses(db_user.id)
+        courses = await self.db_manager.aio.get_user_courses(db_user.id)
 
         if not courses:
             await update.message.reply_text(
@@ -677,23 +784,23 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             )
             return
 
-        message = "📚 *Derslerim*\n\n"
+        parts = ["📚 *Derslerim*\n\n"]
         for i, c in enumerate(courses, 1):
             total = c['total_topics']
             completed = c['completed_topics']
             pct = int((completed / total) * 100) if total > 0 else 0
-            bar = '█' * (pct // 10) + '░' * (10 - pct // 10)
-            message += f"{i}. *{c['name']}*\n"
-            message += f"   {bar} {pct}% ({completed}/{total} konu)\n\n"
+            parts.append(
+                f"{i}. *{c['name']}*\n"
+                f"   {_progress_bar(pct)} {pct}% ({completed}/{total} konu)\n\n"
+            )
 
-        message += "💡 /ders_detay [ders_adı] ile detayları görebilirsin."
+        parts.append("💡 /ders_detay [ders_adı] ile detayları görebilirsin.")
+        message = "".join(parts)
         await update.message.reply_text(message, parse_mode='Markdown')
 
-    async def course_detail_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def course_detail_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """Ders detaylarını göster - /ders_detay"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
         if not context.args:
             await update.message.reply_text(
                 "❌ Kullanım: /ders_detay [ders_adı]\n\n"
@@ -702,17 +809,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             return
 
         course_name = " ".join(context.args).replace("_", " ")
-        courses = self.db_manager.get_user_courses(db_user.id)
-        course = next(
-            (c for c in courses if course_name.lower() in c['name'].lower()),
-            None
-        )
+        courses = await self.db_manager.aio.get_user_courses(db_user.id)
+        course = _find_course(courses, course_name)
 
         if not course:
             await update.message.reply_text(f"❌ '{course_name}' dersi bulunamadı. /dersler ile dersleri görebilirsin.")
             return
 
-        topics = self.db_manager.get_course_topics(course['id'])
+        topics = await self.db_manager.aio.get_course_topics(course['id'])
         message = f"📚 *{course['name']}*\n"
         message += f"📝 {course['description']}\n\n"
         message += f"İlerleme: {course['completed_topics']}/{course['total_topics']} konu\n\n"
@@ -724,10 +828,15 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         await update.message.reply_text(message, parse_mode='Markdown')
 
-    async def learn_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """AI ile konu öğren - /ogren"""
-        user = update.effective_user
+    # /ogren yanıtındaki sabit bölüm başlıkları
+    _LEARN_RULE = "━" * 22
+    _LEARN_EXPLANATION_HEADER = f"{_LEARN_RULE}\n📚 *KONU ANLATIMI*\n{_LEARN_RULE}\n\n"
+    _LEARN_CODE_HEADER = f"{_LEARN_RULE}\n💻 *KOD ÖRNEĞİ*\n{_LEARN_RULE}\n\n"
+    _LEARN_KEY_POINTS_HEADER = f"{_LEARN_RULE}\n🎯 *ÖNEMLİ NOKTALAR*\n{_LEARN_RULE}\n\n"
 
+    @_with_db_user
+    async def learn_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
+        """AI ile konu öğren - /ogren"""
         if not self.ai_teacher or not self.ai_teacher.is_available():
             await update.message.reply_text(
                 "❌ AI öğretmen şu anda kullanılamıyor. GEMINI_API_KEY kontrol edin."
@@ -749,33 +858,28 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         try:
             explanation = await self.ai_teacher.explain_topic(course, topic)
 
-            message = f"🎓 *{course.upper()}*\n"
-            message += f"📖 Konu: {topic}\n\n"
-            message += "━━━━━━━━━━━━━━━━━━━━━━\n"
-            message += "📚 *KONU ANLATIMI*\n"
-            message += "━━━━━━━━━━━━━━━━━━━━━━\n\n"
-            message += explanation['explanation'] + "\n\n"
+            # Parçalar listede toplanıp tek seferde birleştirilir
+            parts = [
+                f"🎓 *{course.upper()}*\n📖 Konu: {topic}\n\n",
+                self._LEARN_EXPLANATION_HEADER,
+                explanation['explanation'], "\n\n",
+            ]
 
             if explanation.get('code_example') and explanation['code_example'].lower() != 'kod örneği yok.':
-                message += "━━━━━━━━━━━━━━━━━━━━━━\n"
-                message += "💻 *KOD ÖRNEĞİ*\n"
-                message += "━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                message += f"```\n{explanation['code_example']}\n```\n\n"
+                parts += [self._LEARN_CODE_HEADER, f"```\n{explanation['code_example']}\n```\n\n"]
 
             if explanation.get('key_points'):
-                message += "━━━━━━━━━━━━━━━━━━━━━━\n"
-                message += "🎯 *ÖNEMLİ NOKTALAR*\n"
-                message += "━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                message += "\n".join(f"• {p}" for p in explanation['key_points']) + "\n\n"
+                parts += [
+                    self._LEARN_KEY_POINTS_HEADER,
+                    "\n".join(f"• {p}" for p in explanation['key_points']), "\n\n",
+                ]
 
             if explanation.get('practical_tip'):
-                message += f"💡 *Pratik İpucu:* {explanation['practical_tip']}\n\n"
+                parts.append(f"💡 *Pratik İpucu:* {explanation['practical_tip']}\n\n")
 
             course_arg = course.replace(' ', '_')
-            topic_arg = topic.replace(' ', '_')
-            message += "━━━━━━━━━━━━━━━━━━━━━━\n"
-            message += f"✅ Quiz: /quiz {course_arg}\n"
-            message += f"🔄 Devam: /devam"
+            parts.append(f"{self._LEARN_RULE}\n✅ Quiz: /quiz {course_arg}\n🔄 Devam: /devam")
+            message = "".join(parts)
 
             # Telegram mesaj boyutu limiti (4096 karakter)
             if len(message) > 4096:
@@ -784,19 +888,16 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             await update.message.reply_text(message, parse_mode='Markdown')
 
             # İlerlemeyi kaydet
-            db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-            self.db_manager.mark_topic_completed(db_user.id, course, topic)
+            await self.db_manager.aio.mark_topic_completed(db_user.id, course, topic)
 
         except Exception as e:
-            logger.error(f"Konu öğrenme hatası: {e}")
+            logger.error("Konu öğrenme hatası: %s", e)
             await update.message.reply_text("❌ Konu anlatımı sırasında bir hata oluştu. Lütfen tekrar deneyin.")
 
-    async def continue_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def continue_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """Kaldığın yerden devam et - /devam"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
-        next_topic = self.db_manager.get_next_topic(db_user.id)
+        next_topic = await self.db_manager.aio.get_next_topic(db_user.id)
 
         if not next_topic:
             await update.message.reply_text(
@@ -818,10 +919,9 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             parse_mode='Markdown'
         )
 
-    async def quiz_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def quiz_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """Quiz çöz - /quiz"""
-        user = update.effective_user
-
         if not self.ai_teacher or not self.ai_teacher.is_available():
             await update.message.reply_text(
                 "❌ AI öğretmen şu anda kullanılamıyor. GEMINI_API_KEY kontrol edin."
@@ -836,12 +936,8 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             return
 
         course_name = " ".join(context.args).replace("_", " ")
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-        courses = self.db_manager.get_user_courses(db_user.id)
-        course = next(
-            (c for c in courses if course_name.lower() in c['name'].lower()),
-            None
-        )
+        courses = await self.db_manager.aio.get_user_courses(db_user.id)
+        course = _find_course(courses, course_name)
 
         if not course:
             await update.message.reply_text(
@@ -850,7 +946,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             return
 
         # Tamamlanmış konulardan quiz yap, yoksa ilk konudan yap
-        topics = self.db_manager.get_course_topics(course['id'])
+        topics = await self.db_manager.aio.get_course_topics(course['id'])
         completed_topics = [t for t in topics if t['is_completed']]
         quiz_topic = completed_topics[-1] if completed_topics else (topics[0] if topics else None)
 
@@ -887,7 +983,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             await self._send_quiz_question(update, context)
 
         except Exception as e:
-            logger.error(f"Quiz başlatma hatası: {e}")
+            logger.error("Quiz başlatma hatası: %s", e)
             await update.message.reply_text("❌ Quiz başlatılırken hata oluştu.")
 
     async def _send_quiz_question(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -946,14 +1042,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         # Sonucu veritabanına kaydet
         try:
-            self.db_manager.add_quiz_result(
+            await self.db_manager.aio.add_quiz_result(
                 quiz.get('user_db_id'),
                 quiz.get('topic_id'),
                 score,
                 total
             )
         except Exception as e:
-            logger.error(f"Quiz sonucu kaydetme hatası: {e}")
+            logger.error("Quiz sonucu kaydetme hatası: %s", e)
 
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
@@ -961,12 +1057,10 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             parse_mode='Markdown'
         )
 
-    async def quiz_result_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def quiz_result_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """Son quiz sonuçları - /quiz_sonuc"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
-        results = self.db_manager.get_last_quiz_results(db_user.id, limit=5)
+        results = await self.db_manager.aio.get_last_quiz_results(db_user.id, limit=5)
 
         if not results:
             await update.message.reply_text(
@@ -985,12 +1079,10 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         await update.message.reply_text(message, parse_mode='Markdown')
 
-    async def progress_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def progress_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """İlerleme raporu göster - /ilerleme"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
-        courses = self.db_manager.get_user_courses(db_user.id)
+        courses = await self.db_manager.aio.get_user_courses(db_user.id)
 
         if not courses:
             await update.message.reply_text(
@@ -1009,19 +1101,18 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             pct = (completed / total) * 100 if total > 0 else 0
             total_progress += pct
 
-            bar = '█' * int(pct / 10) + '░' * (10 - int(pct / 10))
-            message += f"📚 *{c['name']}*: {bar} {pct:.0f}%\n"
+            message += f"📚 *{c['name']}*: {_progress_bar(pct)} {pct:.0f}%\n"
             message += f"• Tamamlanan: {completed}/{total} konu\n"
 
-            avg_score = self.db_manager.get_avg_quiz_score(db_user.id, c['id'])
+            avg_score = await self.db_manager.aio.get_avg_quiz_score(db_user.id, c['id'])
             if avg_score is not None:
                 message += f"• Quiz ortalaması: {avg_score:.0f}%\n"
 
             message += "\n"
 
         avg_total = total_progress / len(courses)
-        streak = self.db_manager.get_streak(db_user.id)
-        total_quizzes = self.db_manager.get_total_quizzes(db_user.id)
+        streak = await self.db_manager.aio.get_streak(db_user.id)
+        total_quizzes = await self.db_manager.aio.get_total_quizzes(db_user.id)
 
         message += "━━━━━━━━━━━━━━━━━━━━━━\n"
         message += f"📈 Genel İlerleme: {avg_total:.0f}%\n"
@@ -1030,16 +1121,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         await update.message.reply_text(message, parse_mode='Markdown')
 
-    async def statistics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def statistics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """Detaylı istatistikler - /istatistik"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
-        courses = self.db_manager.get_user_courses(db_user.id)
+        courses = await self.db_manager.aio.get_user_courses(db_user.id)
         total_topics = sum(c['total_topics'] for c in courses)
         completed_topics = sum(c['completed_topics'] for c in courses)
-        total_quizzes = self.db_manager.get_total_quizzes(db_user.id)
-        streak = self.db_manager.get_streak(db_user.id)
+        total_quizzes = await self.db_manager.aio.get_total_quizzes(db_user.id)
+        streak = await self.db_manager.aio.get_streak(db_user.id)
 
         message = "📈 *DETAYLI İSTATİSTİKLER*\n"
         message += "━━━━━━━━━━━━━━━━━━━━━━\n\n"
@@ -1052,17 +1141,14 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         if total_topics > 0:
             pct = int((completed_topics / total_topics) * 100)
-            bar = '█' * (pct // 10) + '░' * (10 - pct // 10)
-            message += f"Genel İlerleme:\n{bar} {pct}%"
+            message += f"Genel İlerleme:\n{_progress_bar(pct)} {pct}%"
 
         await update.message.reply_text(message, parse_mode='Markdown')
 
-    async def study_plan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @_with_db_user
+    async def study_plan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, db_user):
         """14 haftalık çalışma planı - /plan"""
-        user = update.effective_user
-        db_user = self.db_manager.get_or_create_user(telegram_id=user.id)
-
-        courses = self.db_manager.get_user_courses(db_user.id)
+        courses = await self.db_manager.aio.get_user_courses(db_user.id)
 
         if not courses:
             await update.message.reply_text(
@@ -1076,7 +1162,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         for week in range(1, 15):
             message += f"📆 *Hafta {week}:*\n"
             for c in courses:
-                topics = self.db_manager.get_course_topics(c['id'])
+                topics = await self.db_manager.aio.get_course_topics(c['id'])
                 week_topics = [t for t in topics if t['week_number'] == week]
                 for t in week_topics:
                     status = "✅" if t['is_completed'] else "⬜"
@@ -1101,7 +1187,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
 
         # Callback data'yı işle
         # Gelecekte menüler ve inline butonlar için kullanılabilir
-        logger.info(f"Button callback: {query.data}")
+        logger.info("Button callback: %s", query.data)
 
     async def _handle_quiz_answer(self, update: Update, context: ContextTypes.DEFAULT_TYPE, callback_data: str):
         """Quiz cevabını işle"""
@@ -1192,17 +1278,17 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             else:
                 # "Yazıyor..." göstergesi
                 await bot_context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
-                ai_response = self.ai_assistant.simple_chat(
+                ai_response = await self.ai_assistant.simple_chat(
                     user_message,
                     context=self.MESSAGE_HANDLER_CONTEXT
                 )
 
             await update.message.reply_text(ai_response)
 
-            logger.info(f"Normal mesaj işlendi - User: {user_id}")
+            logger.info("Normal mesaj işlendi - User: %s", user_id)
             
         except Exception as e:
-            logger.error(f"Mesaj işleme hatası: {e}")
+            logger.error("Mesaj işleme hatası: %s", e)
             await update.message.reply_text(
                 "😔 Üzgünüm, bir hata oluştu. Lütfen tekrar deneyin.\n\n"
                 "Komutları görmek için: /yardim"
@@ -1235,8 +1321,9 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         
         # Upscale bekleniyor mu?
         if context.user_data.get('waiting_for_upscale_photo'):
-            await self.process_upscale_photo(update, context)
+            # İşlem sürerken gelen ikinci fotoğraf yeniden yükseltme başlatmasın
             context.user_data['waiting_for_upscale_photo'] = False
+            await self.process_upscale_photo(update, context)
             return
         
         # Genel fotoğraf analizi
@@ -1280,7 +1367,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             input_path = await self.image_handler.download_photo(photo_file, user_id)
             
             # Upscale işlemi
-            output_url = self.image_upscaler.upscale_image(input_path)
+            output_url = await self.image_upscaler.upscale_image(input_path)
             
             if not output_url:
                 await progress_msg.edit_text(
@@ -1292,7 +1379,7 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             
             # Yükseltilmiş görüntüyü indir
             output_path = input_path.replace('.jpg', '_upscaled.jpg')
-            success = self.image_upscaler.download_image(output_url, output_path)
+            success = await self.image_upscaler.download_image(output_url, output_path)
             
             if not success:
                 await progress_msg.edit_text("❌ Görüntü indirilemedi.")
@@ -1300,16 +1387,8 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
                 return
             
             # Sonuç bilgileri - PIL ile görüntü boyutlarını al
-            if Image:
-                try:
-                    with Image.open(output_path) as img:
-                        new_width, new_height = img.size
-                    dimensions_info = f"📊 Sonrası: {new_width}x{new_height}\n"
-                except Exception as e:
-                    logger.warning(f"PIL ile boyut alınamadı: {e}")
-                    dimensions_info = ""
-            else:
-                dimensions_info = ""
+            info = await self.image_upscaler.get_image_info(output_path)
+            dimensions_info = f"📊 Sonrası: {info['width']}x{info['height']}\n" if info else ""
             
             # Yükseltilmiş fotoğrafı gönder
             with open(output_path, 'rb') as photo_file:
@@ -1334,10 +1413,10 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             self.image_handler.cleanup_file(input_path)
             self.image_handler.cleanup_file(output_path)
             
-            logger.info(f"Upscale tamamlandı - User: {user_id}")
+            logger.info("Upscale tamamlandı - User: %s", user_id)
             
         except Exception as e:
-            logger.error(f"Upscale hatası: {e}")
+            logger.error("Upscale hatası: %s", e)
             await update.message.reply_text(
                 "😔 Bir hata oluştu. Lütfen tekrar deneyin.\n\n"
                 "İpuçları:\n"
@@ -1382,13 +1461,40 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
         
         await update.message.reply_text(help_text, parse_mode='Markdown')
     
-    async def send_reminder_notification(self, telegram_id: int, message: str):
+    async def _capture_loop(self, application: Application):
+        """Diğer thread'lerin coroutine gönderebilmesi için çalışan loop'u sakla"""
+        self.loop = asyncio.get_running_loop()
+    
+    async def _close_clients(self, application: Application):
+        """Bot kapanırken paylaşılan HTTP istemcilerini kapat"""
+        if self.image_upscaler:
+            await self.image_upscaler.close()
+    
+    def submit(self, coro) -> Optional[concurrent.futures.Future]:
+        """
+        Coroutine'i başka bir thread'den (ör. zamanlayıcı) bot'un event loop'unda çalıştır
+        
+        Args:
+            coro: Çalıştırılacak coroutine
+            
+        Returns:
+            Sonuç Future'ı; bot henüz çalışmıyorsa None (coroutine kapatılır)
+        """
+        if self.loop is None or self.loop.is_closed():
+            coro.close()
+            return None
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    async def send_reminder_notification(self, telegram_id: int, message: str) -> bool:
         """
         Hatırlatıcı bildirimi gönder
         
         Args:
             telegram_id: Telegram kullanıcı ID'si
             message: Hatırlatıcı mesajı
+            
+        Returns:
+            Gönderildiyse True
         """
         try:
             await self.application.bot.send_message(
@@ -1396,19 +1502,21 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
                 text=f"⏰ *Hatırlatıcı*\n\n{message}",
                 parse_mode='Markdown'
             )
-            logger.info(f"Hatırlatıcı gönderildi: kullanıcı={telegram_id}")
+            logger.info("Hatırlatıcı gönderildi: kullanıcı=%s", telegram_id)
+            return True
         except Exception as e:
-            logger.error(f"Hatırlatıcı gönderme hatası: {e}")
+            logger.error("Hatırlatıcı gönderme hatası: %s", e)
+            return False
     
     async def start(self):
         """Bot'u başlat"""
         try:
             await self.application.initialize()
             await self.application.start()
-            await self.application.updater.start_polling()
+            await self.application.updater.start_polling(timeout=TELEGRAM_POLL_TIMEOUT)
             logger.info("Telegram bot başlatıldı ve polling başladı")
         except Exception as e:
-            logger.error(f"Bot başlatma hatası: {e}")
+            logger.error("Bot başlatma hatası: %s", e)
             raise
     
     async def stop(self):
@@ -1419,13 +1527,27 @@ Kullanılabilir komutları görmek için /yardim yazabilirsin!
             await self.application.shutdown()
             logger.info("Telegram bot durduruldu")
         except Exception as e:
-            logger.error(f"Bot durdurma hatası: {e}")
+            logger.error("Bot durdurma hatası: %s", e)
     
     def run(self):
         """Bot'u çalıştır (blocking)"""
         try:
             logger.info("Telegram bot başlatılıyor...")
-            self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+            if TELEGRAM_WEBHOOK_URL:
+                # Telegram güncellemeleri kendisi gönderir; boş yoklama isteği yapılmaz
+                self.application.run_webhook(
+                    listen="0.0.0.0",
+                    port=TELEGRAM_WEBHOOK_PORT,
+                    url_path="telegram",
+                    webhook_url=f"{TELEGRAM_WEBHOOK_URL}/telegram",
+                    secret_token=TELEGRAM_WEBHOOK_SECRET,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+            else:
+                self.application.run_polling(
+                    allowed_updates=Update.ALL_TYPES,
+                    timeout=TELEGRAM_POLL_TIMEOUT,
+                )
         except Exception as e:
-            logger.error(f"Bot çalıştırma hatası: {e}")
+            logger.error("Bot çalıştırma hatası: %s", e)
             raise
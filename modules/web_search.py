@@ -84,5 +84,5 @@ Format:
                 logger.warning("Web search yanıtı boş veya engellendi")
                 return "Üzgünüm, bu soruya şu anda cevap veremiyorum."
         except Exception as e:
-            logger.error(f"Web search hatası: {e}")
+            logger.error("Web search hatası: %s", e)
             return "Araştırma yaparken bir hata oluştu. Lütfen tekrar deneyin."
@@ -37,7 +37,7 @@ class WhatsAppBot:
             
         Not: Bu fonksiyon henüz implement edilmemiştir
         """
-        logger.warning(f"WhatsApp mesajı gönderilemedi (henüz aktif değil): {phone_number}")
+        logger.warning("WhatsApp mesajı gönderilemedi (henüz aktif değil): %s", phone_number)
         return False
     
     def send_reminder(self, phone_number: str, reminder_message: str) -> bool:
@@ -53,7 +53,7 @@ class WhatsAppBot:
             
         Not: Bu fonksiyon henüz implement edilmemiştir
         """
-        logger.warning(f"WhatsApp hatırlatıcısı gönderilemedi (henüz aktif değil): {phone_number}")
+        logger.warning("WhatsApp hatırlatıcısı gönderilemedi (henüz aktif değil): %s", phone_number)
         return False
     
     def start(self):
@@ -1,6 +1,7 @@
 """
 Yardımcı Fonksiyonlar
 """
+import functools
 import logging
 from datetime import datetime
 from typing import Optional
@@ -12,11 +13,16 @@ from database.models import PriorityLevel
 
 logger = logging.getLogger(__name__)
 
+_LOCAL_TZ = pytz.timezone(TIMEZONE)
 
+
+@functools.lru_cache(maxsize=4096)
 def format_date(dt: datetime, include_time: bool = True) -> str:
     """
     Tarihi Türkçe formatla
     
+    Aynı not/görev listeleri tekrar tekrar gösterildiğinden sonuçlar önbelleğe alınır.
+    
     Args:
         dt: Datetime nesnesi
         include_time: Saati dahil et
@@ -29,17 +35,16 @@ def format_date(dt: datetime, include_time: bool = True) -> str:
     
     try:
         # UTC'den yerel zamana çevir
-        tz = pytz.timezone(TIMEZONE)
         if dt.tzinfo is None:
             dt = pytz.utc.localize(dt)
-        local_dt = dt.astimezone(tz)
+        local_dt = dt.astimezone(_LOCAL_TZ)
         
         if include_time:
             return local_dt.strftime("%d.%m.%Y %H:%M")
         else:
             return local_dt.strftime("%d.%m.%Y")
     except Exception as e:
-        logger.error(f"Tarih formatlama hatası: {e}")
+        logger.error("Tarih formatlama hatası: %s", e)
         return str(dt)
 
 
@@ -71,13 +76,12 @@ def parse_date(date_str: str) -> Optional[datetime]:
         parsed_date = parser.parse(date_str, dayfirst=True)
         
         # Timezone bilgisi ekle
-        tz = pytz.timezone(TIMEZONE)
         if parsed_date.tzinfo is None:
-            parsed_date = tz.localize(parsed_date)
+            parsed_date = _LOCAL_TZ.localize(parsed_date)
         
         return parsed_date
     except Exception as e:
-        logger.error(f"Tarih parse hatası: {e}")
+        logger.error("Tarih parse hatası: %s", e)
         return None
 
 
@@ -47,9 +47,9 @@ class ReminderScheduler:
                         id='reminder_checker',
                         replace_existing=True
                     )
-                    logger.info(f"Hatırlatıcı kontrolü her {REMINDER_CHECK_INTERVAL} saniyede bir çalışacak")
+                    logger.info("Hatırlatıcı kontrolü her %s saniyede bir çalışacak", REMINDER_CHECK_INTERVAL)
             except Exception as e:
-                logger.error(f"Scheduler başlatma hatası: {e}")
+                logger.error("Scheduler başlatma hatası: %s", e)
                 raise
     
     def stop(self):
@@ -60,7 +60,7 @@ class ReminderScheduler:
                 self.is_running = False
                 logger.info("Hatırlatıcı zamanlayıcı durduruldu")
             except Exception as e:
-                logger.error(f"Scheduler durdurma hatası: {e}")
+                logger.error("Scheduler durdurma hatası: %s", e)
     
     def _check_reminders(self):
         """Bekleyen hatırlatıcıları kontrol et"""
@@ -68,7 +68,7 @@ class ReminderScheduler:
             try:
                 self.reminder_callback()
             except Exception as e:
-                logger.error(f"Hatırlatıcı kontrol hatası: {e}")
+                logger.error("Hatırlatıcı kontrol hatası: %s", e)
     
     def add_reminder(self, reminder_id: int, remind_at: datetime, 
                     callback: Callable, *args, **kwargs):
@@ -98,9 +98,9 @@ class ReminderScheduler:
                 replace_existing=True
             )
             
-            logger.info(f"Hatırlatıcı zamanlandı: ID={reminder_id}, Zaman={remind_at}")
+            logger.info("Hatırlatıcı zamanlandı: ID=%s, Zaman=%s", reminder_id, remind_at)
         except Exception as e:
-            logger.error(f"Hatırlatıcı ekleme hatası: {e}")
+            logger.error("Hatırlatıcı ekleme hatası: %s", e)
     
     def remove_reminder(self, reminder_id: int):
         """
@@ -112,9 +112,9 @@ class ReminderScheduler:
         try:
             job_id = f"reminder_{reminder_id}"
             self.scheduler.remove_job(job_id)
-            logger.info(f"Hatırlatıcı kaldırıldı: ID={reminder_id}")
+            logger.info("Hatırlatıcı kaldırıldı: ID=%s", reminder_id)
         except Exception as e:
-            logger.warning(f"Hatırlatıcı kaldırma hatası: {e}")
+            logger.warning("Hatırlatıcı kaldırma hatası: %s", e)
     
     def add_recurring_reminder(self, reminder_id: int, recurrence_pattern: str,
                               start_date: datetime, callback: Callable, 
@@ -154,7 +154,7 @@ class ReminderScheduler:
                     'minute': start_date.minute
                 }
             else:
-                logger.warning(f"Bilinmeyen tekrar düzeni: {recurrence_pattern}")
+                logger.warning("Bilinmeyen tekrar düzeni: %s", recurrence_pattern)
                 return
             
             self.scheduler.add_job(
@@ -167,9 +167,9 @@ class ReminderScheduler:
                 **trigger_args
             )
             
-            logger.info(f"Tekrarlanan hatırlatıcı zamanlandı: ID={reminder_id}, Düzen={recurrence_pattern}")
+            logger.info("Tekrarlanan hatırlatıcı zamanlandı: ID=%s, Düzen=%s", reminder_id, recurrence_pattern)
         except Exception as e:
-            logger.error(f"Tekrarlanan hatırlatıcı ekleme hatası: {e}")
+            logger.error("Tekrarlanan hatırlatıcı ekleme hatası: %s", e)
     
     def get_scheduled_jobs_count(self) -> int:
         """Zamanlanmış görev sayısını döndür"""